@@ -0,0 +1,361 @@
+"""
+In-process and Redis-backed caches used by the FindBuddy API
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_redis_client = None
+
+def get_redis():
+    """Return a shared redis.asyncio client when REDIS_URL is configured, otherwise None"""
+    global _redis_client
+    redis_url = os.environ.get("REDIS_URL")
+    if not redis_url:
+        return None
+    if _redis_client is None:
+        # Optional dependency: only needed when a Redis tier is configured
+        import redis.asyncio as redis
+        _redis_client = redis.from_url(redis_url)
+    return _redis_client
+
+async def close_redis():
+    global _redis_client
+    if _redis_client is not None:
+        await _redis_client.close()
+        _redis_client = None
+
+class TTLCache:
+    """LRU cache whose entries also expire a fixed number of seconds after being set"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class InvalidationBus:
+    """Relays TwoTierCache invalidations to every worker through Redis pub/sub.
+
+    Each worker keeps its own local tier, so without this an entry invalidated on one worker
+    would still be served by the others until its local TTL ran out.
+    """
+
+    CHANNEL = "findbuddy:cache:invalidate"
+
+    def __init__(self):
+        self.caches: Dict[str, "TwoTierCache"] = {}
+        self._listener = None
+        self.published = 0
+        self.received = 0
+
+    def register(self, cache: "TwoTierCache"):
+        self.caches[cache.prefix] = cache
+
+    async def start(self):
+        redis = get_redis()
+        if redis is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen(redis))
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def publish(self, prefix: str, key: str):
+        redis = get_redis()
+        if redis is None:
+            return
+        await redis.publish(self.CHANNEL, json.dumps([prefix, key]))
+        self.published += 1
+
+    async def _listen(self, redis):
+        pubsub = redis.pubsub()
+        await pubsub.subscribe(self.CHANNEL)
+        try:
+            while True:
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        prefix, key = json.loads(message["data"])
+                        cache = self.caches.get(prefix)
+                        if cache is not None:
+                            cache.local.delete(key)
+                            self.received += 1
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Cache invalidation listener error, resubscribing: {e}")
+                    await asyncio.sleep(1)
+                    await pubsub.subscribe(self.CHANNEL)
+        finally:
+            await pubsub.close()
+
+invalidation_bus = InvalidationBus()
+
+class TwoTierCache:
+    """Local TTL/LRU cache in front of an optional Redis tier shared by all workers"""
+
+    def __init__(
+        self,
+        prefix: str,
+        encode: Callable[[Any], bytes],
+        decode: Callable[[bytes], Any],
+        maxsize: int = 10000,
+        local_ttl: float = 30.0,
+        redis_ttl: int = 300
+    ):
+        self.prefix = prefix
+        self.encode = encode
+        self.decode = decode
+        self.local = TTLCache(maxsize=maxsize, ttl=local_ttl)
+        self.redis_ttl = redis_ttl
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.redis_errors = 0
+        invalidation_bus.register(self)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None:
+            self.local_hits += 1
+            return value
+
+        redis = get_redis()
+        if redis is not None:
+            try:
+                raw = await redis.get(self._key(key))
+            except Exception as e:
+                # A Redis outage should degrade to database lookups, not failed requests
+                self.redis_errors += 1
+                logger.warning(f"Redis get failed for {self.prefix}: {e}")
+                raw = None
+            if raw is not None:
+                value = self.decode(raw)
+                self.local.set(key, value)
+                self.redis_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any):
+        self.local.set(key, value)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                await redis.set(self._key(key), self.encode(value), ex=self.redis_ttl)
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"Redis set failed for {self.prefix}: {e}")
+
+    async def invalidate(self, key: str):
+        self.invalidations += 1
+        self.local.delete(key)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                await redis.delete(self._key(key))
+                await invalidation_bus.publish(self.prefix, key)
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"Redis delete failed for {self.prefix}: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            "size": len(self.local),
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.local_hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "redis_errors": self.redis_errors,
+            "redis_enabled": get_redis() is not None
+        }
+
+class FeedCache:
+    """Serialized feed pages keyed by scope (e.g. a normalized city) and filter.
+
+    Writes bump the scope's version instead of deleting keys, so every cached page for the scope
+    becomes unreachable at once. Concurrent misses for the same page are collapsed into a single
+    fill: per key inside a worker, and via a short Redis lock across workers.
+    """
+
+    def __init__(
+        self,
+        prefix: str = "feed",
+        ttl: float = 15.0,
+        maxsize: int = 1000,
+        lock_timeout: float = 5.0
+    ):
+        self.prefix = prefix
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.pages = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.versions: Dict[str, int] = {}
+        self._fill_locks: Dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.fills = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self.redis_errors = 0
+
+    async def _version(self, scope: str) -> int:
+        redis = get_redis()
+        if redis is not None:
+            try:
+                return int(await redis.get(f"{self.prefix}:version:{scope}") or 0)
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"Redis version lookup failed for {self.prefix}: {e}")
+        return self.versions.get(scope, 0)
+
+    async def invalidate(self, scope: str):
+        self.invalidations += 1
+        self.versions[scope] = self.versions.get(scope, 0) + 1
+        redis = get_redis()
+        if redis is not None:
+            try:
+                await redis.incr(f"{self.prefix}:version:{scope}")
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"Redis invalidation failed for {self.prefix}: {e}")
+
+    async def _get(self, key: str) -> Optional[bytes]:
+        value = self.pages.get(key)
+        if value is not None:
+            return value
+        redis = get_redis()
+        if redis is not None:
+            try:
+                value = await redis.get(f"{self.prefix}:page:{key}")
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"Redis get failed for {self.prefix}: {e}")
+                return None
+            if value is not None:
+                self.pages.set(key, value)
+        return value
+
+    async def _set(self, key: str, value: bytes):
+        self.pages.set(key, value)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                await redis.set(f"{self.prefix}:page:{key}", value, ex=max(1, int(self.ttl)))
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"Redis set failed for {self.prefix}: {e}")
+
+    async def get_or_fill(self, scope: str, key: str, fill: Callable[[], Awaitable[bytes]]) -> bytes:
+        full_key = f"{scope}:{await self._version(scope)}:{key}"
+        value = await self._get(full_key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        lock = self._fill_locks.setdefault(full_key, asyncio.Lock())
+        if lock.locked():
+            self.coalesced += 1
+        try:
+            async with lock:
+                value = await self._get(full_key)
+                if value is not None:
+                    self.hits += 1
+                    return value
+                self.misses += 1
+                if await self._acquire_fill_lock(full_key):
+                    value = await fill()
+                    self.fills += 1
+                    await self._set(full_key, value)
+                    return value
+                # Another worker is filling this page; wait briefly for it, then give up and fill here
+                value = await self._wait_for_page(full_key)
+                if value is None:
+                    value = await fill()
+                    self.fills += 1
+                    await self._set(full_key, value)
+                return value
+        finally:
+            if not lock.locked() and self._fill_locks.get(full_key) is lock:
+                del self._fill_locks[full_key]
+
+    async def _acquire_fill_lock(self, key: str) -> bool:
+        redis = get_redis()
+        if redis is None:
+            return True
+        try:
+            return bool(await redis.set(
+                f"{self.prefix}:lock:{key}", b"1", nx=True, px=int(self.lock_timeout * 1000)
+            ))
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning(f"Redis lock failed for {self.prefix}: {e}")
+            return True
+
+    async def _wait_for_page(self, key: str) -> Optional[bytes]:
+        self.coalesced += 1
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.025)
+            value = await self._get(key)
+            if value is not None:
+                return value
+        return None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.pages),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "fills": self.fills,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "redis_errors": self.redis_errors,
+            "redis_enabled": get_redis() is not None
+        }
@@ -0,0 +1,38 @@
+"""
+Offline geocoding backed by a local gazetteer file (no external geocoding service)
+"""
+import csv
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+DEFAULT_GAZETTEER_PATH = Path(__file__).parent / "data" / "gazetteer.csv"
+
+def normalize_place(text: str) -> str:
+    return " ".join(text.replace(",", " ").lower().split())
+
+class Gazetteer:
+    """Place name -> (latitude, longitude) lookups from a CSV with place,latitude,longitude columns.
+
+    Places may be cities ("Palo Alto") or full addresses ("567 University Avenue, Palo Alto");
+    geocode() tries the address first and falls back to the city centroid.
+    """
+
+    def __init__(self, path: Path = DEFAULT_GAZETTEER_PATH):
+        self.path = Path(path)
+        self.places: Dict[str, Tuple[float, float]] = {}
+        if self.path.exists():
+            with open(self.path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    self.places[normalize_place(row["place"])] = (float(row["latitude"]), float(row["longitude"]))
+
+    def __len__(self) -> int:
+        return len(self.places)
+
+    def lookup(self, place: str) -> Optional[Tuple[float, float]]:
+        return self.places.get(normalize_place(place or ""))
+
+    def geocode(self, address: str, city: str) -> Optional[Tuple[float, float]]:
+        return self.lookup(f"{address}, {city}") or self.lookup(city)
+
+gazetteer = Gazetteer(Path(os.environ.get("GAZETTEER_PATH", DEFAULT_GAZETTEER_PATH)))
@@ -0,0 +1,25 @@
+"""
+Gunicorn settings for running the API as several Uvicorn worker processes.
+
+    gunicorn -c gunicorn.conf.py server:app
+
+Send SIGHUP to the master for a graceful reload: new workers start, old ones finish their
+in-flight requests (up to graceful_timeout) and exit.
+"""
+import multiprocessing
+import os
+
+workers = int(os.environ.get("WEB_CONCURRENCY") or multiprocessing.cpu_count())
+# Workers read this to size per-process pools and to know whether state must be shared
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = os.environ.get("BIND", "0.0.0.0:8001")
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", 30))
+timeout = int(os.environ.get("WORKER_TIMEOUT", 60))
+keepalive = int(os.environ.get("KEEPALIVE", 5))
+# Recycle workers now and then so slow leaks can't accumulate; jitter keeps them from restarting together
+max_requests = int(os.environ.get("MAX_REQUESTS", 0))
+max_requests_jitter = int(os.environ.get("MAX_REQUESTS_JITTER", 0))
+accesslog = None
+errorlog = "-"
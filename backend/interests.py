@@ -0,0 +1,131 @@
+"""
+Canonical interest vocabulary: free-text interests resolved to stable ids once, at write time
+"""
+import re
+from typing import Dict, FrozenSet, Iterable, List, Set
+
+# Canonical interest id -> aliases that resolve to it. Ids are slugs, so every worker
+# derives the same id for the same interest without coordinating through the database.
+SEED_VOCABULARY = {
+    "art": ["arts", "painting", "drawing"],
+    "basketball": ["hoops"],
+    "board-games": ["boardgames", "board game", "tabletop", "tabletop games"],
+    "business": [],
+    "career": ["careers", "career development", "professional development"],
+    "cloud-computing": ["cloud", "aws", "azure", "gcp"],
+    "coffee": ["cafe", "cafes", "espresso"],
+    "cooking": ["baking", "culinary"],
+    "culture": ["cultural events"],
+    "devops": ["dev ops", "kubernetes", "docker"],
+    "entrepreneurship": ["founders"],
+    "festivals": ["festival"],
+    "fitness": ["gym", "workout", "workouts"],
+    "food": ["foodie", "dining", "restaurants"],
+    "gaming": ["video games", "esports"],
+    "hiking": ["hike", "hikes", "trekking", "trails"],
+    "movies": ["movie", "film", "films", "cinema"],
+    "music": ["concerts", "live music"],
+    "networking": ["meetups", "meetup"],
+    "photography": ["photos", "photo walks"],
+    "sports": ["sport"],
+    "startups": ["startup"],
+    "technology": ["tech"],
+    "wine": ["wine tasting"],
+    "yoga": ["meditation"],
+}
+
+_WHITESPACE = re.compile(r"\s+")
+_NON_SLUG = re.compile(r"[^a-z0-9]+")
+
+def normalize_interest(text: str) -> str:
+    return _WHITESPACE.sub(" ", text.strip().lstrip("#").lower()).strip()
+
+def slugify(text: str) -> str:
+    return _NON_SLUG.sub("-", normalize_interest(text)).strip("-")
+
+def _contains_words(outer: str, inner: str) -> bool:
+    # Whole-word containment, so "food" matches "street food" but "art" doesn't match "startups"
+    return f" {inner} " in f" {outer} "
+
+# Ids learned from user input beyond the seed; past this, unseen interests still get a slug id
+# but no partial matches, so free text can't grow every worker's vocabulary without bound
+MAX_LEARNED_INTERESTS = 5000
+
+class InterestVocabulary:
+    """Resolves interest text to canonical ids and knows which ids partially match each other.
+
+    Partial matching (one label's words contained in another's, e.g. "food" and "street food")
+    is worked out once per id when it enters the vocabulary, not on every comparison. Labels are
+    indexed by word, so a new id is only compared with the ids it shares a word with.
+    """
+
+    def __init__(self, seed: Dict[str, List[str]] = SEED_VOCABULARY, max_learned: int = MAX_LEARNED_INTERESTS):
+        self.aliases: Dict[str, str] = {}
+        self.labels: Dict[str, Set[str]] = {}
+        self.max_learned = max_learned
+        self.learned = 0
+        self._related: Dict[str, Set[str]] = {}
+        self._ids_by_word: Dict[str, Set[str]] = {}
+        for interest_id, aliases in seed.items():
+            self._add(interest_id, [interest_id.replace("-", " "), *aliases])
+
+    def _add(self, interest_id: str, labels: Iterable[str]):
+        labels = {normalize_interest(label) for label in labels if normalize_interest(label)}
+        for label in labels:
+            self.aliases.setdefault(label, interest_id)
+            self.aliases.setdefault(slugify(label), interest_id)
+        self.labels.setdefault(interest_id, set()).update(labels)
+
+        # Whole-word containment needs at least one shared word, so only those ids are candidates
+        words = {word for label in labels for word in label.split()}
+        candidates = set().union(*(self._ids_by_word.get(word, ()) for word in words))
+        for word in words:
+            self._ids_by_word.setdefault(word, set()).add(interest_id)
+
+        related = self._related.setdefault(interest_id, {interest_id})
+        for other_id in candidates - related:
+            other_labels = self.labels[other_id]
+            if any(_contains_words(a, b) or _contains_words(b, a) for a in labels for b in other_labels):
+                related.add(other_id)
+                self._related[other_id].add(interest_id)
+
+    def _learn(self, interest_id: str, labels: Iterable[str]) -> bool:
+        if self.learned >= self.max_learned:
+            return False
+        self.learned += 1
+        self._add(interest_id, labels)
+        return True
+
+    def resolve(self, text: str) -> str:
+        """Canonical id for one interest, registering unseen interests as new ids"""
+        label = normalize_interest(text)
+        interest_id = self.aliases.get(label) or self.aliases.get(slugify(label))
+        if interest_id is None:
+            interest_id = slugify(label)
+            if not interest_id:
+                return ""
+            if interest_id not in self.labels:
+                self._learn(interest_id, [label])
+        return interest_id
+
+    def learn(self, interest_ids: Iterable[str]):
+        """Add ids stored by other workers (or earlier runs) so their partial matches are known here"""
+        for interest_id in interest_ids:
+            if interest_id and interest_id not in self.labels:
+                if not self._learn(interest_id, [interest_id.replace("-", " ")]):
+                    break
+
+    def resolve_many(self, interests: Iterable[str]) -> List[str]:
+        return sorted({interest_id for interest_id in map(self.resolve, interests) if interest_id})
+
+    def related(self, interest_id: str) -> FrozenSet[str]:
+        """The id itself plus every id that partially matches it"""
+        return frozenset(self._related.get(interest_id, {interest_id}))
+
+    def expand(self, interest_ids: Iterable[str]) -> List[str]:
+        expanded = set()
+        for interest_id in interest_ids:
+            expanded |= self.related(interest_id)
+        return sorted(expanded)
+
+vocabulary = InterestVocabulary()
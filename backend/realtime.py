@@ -0,0 +1,142 @@
+"""
+Pub/sub hub that pushes real-time events (new messages, read receipts) to WebSocket clients
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Dict, Set
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from cache import get_redis
+
+logger = logging.getLogger(__name__)
+
+class MessageHub:
+    """Fans events out to every WebSocket connection a user has open.
+
+    Events are delivered in-process by default. When REDIS_URL is set they are published to
+    Redis instead, and every worker relays them to the connections it holds.
+    """
+
+    CHANNEL_PREFIX = "findbuddy:user:"
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self.connections: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._listener = None
+        self.published = 0
+        self.delivered = 0
+        self.dropped_connections = 0
+        self.redis_errors = 0
+
+    async def start(self):
+        redis = get_redis()
+        if redis is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen(redis))
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def publish(self, user_id: str, event: dict):
+        payload = json.dumps(event, default=str)
+        self.published += 1
+        redis = get_redis()
+        if redis is not None:
+            try:
+                await redis.publish(f"{self.CHANNEL_PREFIX}{user_id}", payload)
+                return
+            except Exception as e:
+                # The event is a notification about data that is already stored; a Redis outage must
+                # not fail the write, so it degrades to this worker's own connections
+                self.redis_errors += 1
+                logger.warning(f"Redis publish failed for realtime event: {e}")
+        self._deliver(user_id, payload)
+
+    def _deliver(self, user_id: str, payload: str):
+        for queue in list(self.connections.get(user_id, ())):
+            try:
+                queue.put_nowait(payload)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                # A client that can't keep up is disconnected rather than buffered without bound
+                self.dropped_connections += 1
+                self._remove(user_id, queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def _listen(self, redis):
+        pubsub = redis.pubsub()
+        await pubsub.psubscribe(f"{self.CHANNEL_PREFIX}*")
+        try:
+            while True:
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] != "pmessage":
+                            continue
+                        channel = message["channel"]
+                        if isinstance(channel, bytes):
+                            channel = channel.decode("utf-8")
+                        data = message["data"]
+                        if isinstance(data, bytes):
+                            data = data.decode("utf-8")
+                        self._deliver(channel[len(self.CHANNEL_PREFIX):], data)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Realtime Redis listener error, resubscribing: {e}")
+                    await asyncio.sleep(1)
+                    await pubsub.psubscribe(f"{self.CHANNEL_PREFIX}*")
+        finally:
+            await pubsub.close()
+
+    def _remove(self, user_id: str, queue: asyncio.Queue):
+        queues = self.connections.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.connections[user_id]
+
+    async def serve(self, user_id: str, websocket: WebSocket):
+        """Pump events to an accepted WebSocket until either side goes away"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.connections[user_id].add(queue)
+
+        async def send_events():
+            while True:
+                payload = await queue.get()
+                if payload is None:
+                    await websocket.close(code=1013)
+                    return
+                await websocket.send_text(payload)
+
+        sender = asyncio.create_task(send_events())
+        try:
+            while True:
+                # Clients only send keep-alive pings; anything else is ignored
+                text = await websocket.receive_text()
+                if text == "ping" and not queue.full():
+                    queue.put_nowait(json.dumps({"type": "pong"}))
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self._remove(user_id, queue)
+            sender.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis" if get_redis() is not None else "memory",
+            "connected_users": len(self.connections),
+            "connections": sum(len(queues) for queues in self.connections.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped_connections": self.dropped_connections,
+            "redis_errors": self.redis_errors
+        }
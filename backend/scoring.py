@@ -0,0 +1,169 @@
+"""
+Vectorized batch scoring used to rank thousands of activities per request.
+
+These functions reproduce calculate_interest_match_score and calculate_distance from server.py,
+but work on whole candidate sets with NumPy instead of one pair at a time.
+"""
+from datetime import datetime
+from typing import AbstractSet, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distances in km from one point to arrays of points (NaN where coordinates are missing)"""
+    lat1 = np.radians(lat)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(lons, dtype=np.float64) - lon)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def normalize_interest(interest: str) -> str:
+    return interest.lower().strip()
+
+class InterestEncoder:
+    """Maps normalized interests to integer ids and caches which ids partially match each other.
+
+    By default two interests partially match when one is a substring of the other, the same rule
+    calculate_interest_match_score applies pair by pair. Pass related (e.g. the canonical
+    vocabulary's) to encode interest ids and use that rule instead.
+    """
+
+    def __init__(self, related: Optional[Callable[[str], AbstractSet[str]]] = None):
+        self.ids: Dict[str, int] = {}
+        self.terms: List[str] = []
+        self._related: Dict[int, np.ndarray] = {}
+        self._related_terms = related
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def encode(self, interests: Sequence[str]) -> np.ndarray:
+        """Unique ids for a list of free-text interests, adding unseen ones to the vocabulary"""
+        encoded = set()
+        for interest in interests:
+            term = normalize_interest(interest)
+            term_id = self.ids.get(term)
+            if term_id is None:
+                term_id = len(self.terms)
+                self.ids[term] = term_id
+                self.terms.append(term)
+            encoded.add(term_id)
+        return np.fromiter(encoded, dtype=np.int64, count=len(encoded))
+
+    def related(self, term_id: int) -> np.ndarray:
+        """Boolean row over the vocabulary marking terms that contain, or are contained in, term_id"""
+        row = self._related.get(term_id)
+        if row is None or len(row) < len(self.terms):
+            term = self.terms[term_id]
+            known = 0 if row is None else len(row)
+            if self._related_terms is not None:
+                related_terms = self._related_terms(term)
+                matches = (other in related_terms for other in self.terms[known:])
+            else:
+                matches = (term in other or other in term for other in self.terms[known:])
+            extension = np.fromiter(matches, dtype=bool, count=len(self.terms) - known)
+            row = extension if row is None else np.concatenate([row, extension])
+            self._related[term_id] = row
+        return row
+
+    def membership_matrix(self, encoded_lists: Sequence[np.ndarray]) -> np.ndarray:
+        """(candidates x vocabulary) boolean matrix with one row per encoded interest list"""
+        matrix = np.zeros((len(encoded_lists), len(self.terms)), dtype=bool)
+        rows = np.repeat(np.arange(len(encoded_lists)), [len(ids) for ids in encoded_lists])
+        if len(rows):
+            matrix[rows, np.concatenate(encoded_lists)] = True
+        return matrix
+
+def batch_interest_scores(
+    user_interests: Sequence[str],
+    activity_interests: Sequence[Sequence[str]],
+    encoder: Optional[InterestEncoder] = None
+) -> np.ndarray:
+    """calculate_interest_match_score for one user against many activities at once"""
+    count = len(activity_interests)
+    if not user_interests:
+        return np.full(count, 0.3)
+
+    if encoder is None:
+        encoder = InterestEncoder()
+    user_ids = encoder.encode(user_interests)
+    activity_ids = [encoder.encode(interests) for interests in activity_interests]
+    membership = encoder.membership_matrix(activity_ids)
+
+    # Direct score: Jaccard overlap of the two interest sets
+    activity_sizes = membership.sum(axis=1)
+    intersection = membership[:, user_ids].sum(axis=1)
+    union = len(user_ids) + activity_sizes - intersection
+    direct = np.divide(intersection, union, out=np.zeros(count), where=intersection > 0)
+
+    # Partial score: 0.3 for every user interest with at least one substring match in the activity
+    related = np.stack([encoder.related(term_id) for term_id in user_ids])
+    partial_hits = (membership.astype(np.float32) @ related.T.astype(np.float32) > 0).sum(axis=1)
+    partial = 0.3 * partial_hits
+
+    scores = np.minimum(1.0, np.maximum(direct, partial))
+    scores[activity_sizes == 0] = 0.2
+    return scores
+
+def score_candidates(
+    candidates: Sequence[dict],
+    user_interests: Sequence[str],
+    now: datetime,
+    radius_km: float,
+    weights: Dict[str, float],
+    origin: Optional[tuple] = None,
+    recency_half_life_hours: float = 72.0,
+    popularity_saturation: int = 50,
+    encoder: Optional[InterestEncoder] = None,
+    interest_field: str = "interests"
+) -> Dict[str, np.ndarray]:
+    """Interest, distance, recency and popularity components plus the weighted total for every candidate"""
+    interest = batch_interest_scores(
+        user_interests, [candidate.get(interest_field) or [] for candidate in candidates], encoder
+    )
+
+    distance_km = np.array(
+        [np.nan if candidate.get("distance_km") is None else candidate["distance_km"] for candidate in candidates],
+        dtype=np.float64
+    )
+    if origin is not None:
+        missing = np.isnan(distance_km)
+        if missing.any():
+            lats = np.array([_coordinate(candidate, "latitude") for candidate in candidates])
+            lons = np.array([_coordinate(candidate, "longitude") for candidate in candidates])
+            distance_km[missing] = haversine_km(origin[0], origin[1], lats[missing], lons[missing])
+    # Without a location to measure from, distance neither helps nor hurts
+    distance = np.where(np.isnan(distance_km), 0.5, np.clip(1.0 - distance_km / radius_km, 0.0, 1.0))
+
+    age_hours = np.array(
+        [max(0.0, (now - candidate["created_at"]).total_seconds() / 3600) for candidate in candidates],
+        dtype=np.float64
+    )
+    recency = 0.5 ** (age_hours / recency_half_life_hours)
+
+    engagement = np.array(
+        [candidate.get("participant_count", 0) + candidate.get("like_count", 0) for candidate in candidates],
+        dtype=np.float64
+    )
+    popularity = np.minimum(1.0, np.log1p(engagement) / np.log1p(popularity_saturation))
+
+    total = (
+        weights["interest"] * interest
+        + weights["distance"] * distance
+        + weights["recency"] * recency
+        + weights["popularity"] * popularity
+    )
+    return {
+        "interest": interest,
+        "distance": distance,
+        "recency": recency,
+        "popularity": popularity,
+        "total": total
+    }
+
+def _coordinate(candidate: dict, field: str) -> float:
+    value = candidate.get(field)
+    return np.nan if value is None else value
@@ -0,0 +1,178 @@
+"""
+Search terms for the inverted-index fallback and typo-tolerant prefix suggestions for autocomplete
+"""
+import re
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Set
+
+from pymongo import DESCENDING, UpdateOne
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i in is it its me my of on or our so "
+    "the this that to us we were will with you your".split()
+)
+_WORD = re.compile(r"[^\W_]+")
+
+# Suggestion keys stop at this prefix length; longer prefixes are selective enough without them
+MAX_PREFIX_LENGTH = 10
+# Shorter prefixes must match exactly: one edit changes too much of a 2-3 letter prefix
+MIN_TYPO_PREFIX_LENGTH = 4
+
+def stem(token: str) -> str:
+    # Plural folding only, applied to documents and queries alike so "hikes" finds "hike"
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _WORD.findall((text or "").lower()) if len(token) > 1 and token not in STOPWORDS]
+
+def _texts(doc: dict, fields: Iterable[str]) -> List[str]:
+    texts = []
+    for field in fields:
+        value = doc.get(field)
+        if isinstance(value, list):
+            texts.extend(str(item) for item in value)
+        elif value:
+            texts.append(str(value))
+    return texts
+
+def document_terms(doc: dict, fields: Iterable[str]) -> List[str]:
+    """Distinct stemmed terms of the given fields, stored on the document as its inverted-index entries"""
+    return sorted({stem(token) for text in _texts(doc, fields) for token in tokenize(text)})
+
+def suggestion_terms(doc: dict, fields: Iterable[str]) -> Set[str]:
+    """Whole words worth offering as completions (unstemmed, so suggestions read naturally)"""
+    return {token for text in _texts(doc, fields) for token in tokenize(text)}
+
+# Fields searched per collection; names, titles and tags also feed autocomplete, descriptions don't
+ACTIVITY_SEARCH_FIELDS = ("title", "description", "category", "interests")
+ACTIVITY_SUGGESTION_FIELDS = ("title", "category", "interests")
+MERCHANT_SEARCH_FIELDS = ("business_name", "business_type", "description")
+MERCHANT_SUGGESTION_FIELDS = ("business_name", "business_type")
+
+def deletes(text: str) -> Set[str]:
+    return {text[:i] + text[i + 1:] for i in range(len(text))}
+
+def suggestion_keys(term: str) -> List[str]:
+    """Index keys for one vocabulary term: its prefixes plus every prefix with one character deleted.
+
+    A query prefix is looked up by itself and its own one-character deletes; the two sides meet on a
+    shared key whenever the prefixes are one insertion, deletion, substitution or transposition apart.
+    """
+    keys = set()
+    for length in range(2, min(len(term), MAX_PREFIX_LENGTH) + 1):
+        prefix = term[:length]
+        keys.add(prefix)
+        if length >= MIN_TYPO_PREFIX_LENGTH:
+            keys.update(deletes(prefix))
+    return sorted(keys)
+
+def query_keys(prefix: str) -> List[str]:
+    prefix = prefix[:MAX_PREFIX_LENGTH]
+    keys = {prefix}
+    if len(prefix) >= MIN_TYPO_PREFIX_LENGTH:
+        keys.update(deletes(prefix))
+    return sorted(keys)
+
+def edit_distance(a: str, b: str) -> int:
+    """Damerau-Levenshtein distance (optimal string alignment)"""
+    previous_row, row = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before_previous_row, previous_row, row = previous_row, row, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            row[j] = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                row[j] = min(row[j], before_previous_row[j - 2] + 1)
+    return row[-1]
+
+def prefix_distance(prefix: str, term: str) -> int:
+    """Edits needed to turn prefix into some prefix of term"""
+    prefix = prefix[:MAX_PREFIX_LENGTH]
+    lengths = {length for length in (len(prefix) - 1, len(prefix), len(prefix) + 1) if 0 < length <= len(term)}
+    return min((edit_distance(prefix, term[:length]) for length in lengths), default=len(prefix))
+
+def rank_suggestions(prefix: str, candidates: List[dict], limit: int) -> List[dict]:
+    """Closest first, then most used; candidates more than one edit away are dropped"""
+    max_distance = 1 if len(prefix) >= MIN_TYPO_PREFIX_LENGTH else 0
+    ranked = []
+    for candidate in candidates:
+        distance = prefix_distance(prefix, candidate["term"])
+        if distance <= max_distance:
+            ranked.append({"term": candidate["term"], "count": candidate["count"], "distance": distance})
+    ranked.sort(key=lambda suggestion: (suggestion["distance"], -suggestion["count"], suggestion["term"]))
+    return ranked[:limit]
+
+async def record_suggestions(database, terms: Iterable[str], increment: int = 1):
+    """Count terms into the search_suggestions vocabulary, adding unseen terms with their keys"""
+    counts: Dict[str, int] = {}
+    for term in terms:
+        counts[term] = counts.get(term, 0) + increment
+    if not counts:
+        return
+    await database.search_suggestions.bulk_write([
+        UpdateOne(
+            {"term": term},
+            {"$inc": {"count": count}, "$setOnInsert": {"keys": suggestion_keys(term)}},
+            upsert=True
+        )
+        for term, count in counts.items()
+    ], ordered=False)
+
+async def suggest(database, prefix: str, limit: int = 10) -> List[dict]:
+    """Vocabulary terms starting with prefix, allowing one typo once the prefix is long enough"""
+    prefix = prefix.lower()
+    if len(prefix) < 2:
+        return []
+    # Served by search_suggestions_keys_count: every key's most used terms, merged across keys
+    candidates = await database.search_suggestions.find(
+        {"keys": {"$in": query_keys(prefix)}}, {"_id": 0, "term": 1, "count": 1}
+    ).sort("count", DESCENDING).limit(limit * 10).to_list(limit * 10)
+    return rank_suggestions(prefix, candidates, limit)
+
+async def rebuild_search_index(database, batch_size: int = 500) -> dict:
+    """Recompute search_terms on every activity and merchant and rebuild the suggestion vocabulary.
+
+    Writes keep both up to date incrementally; this repairs drift (archived activities still count
+    towards suggestions until then) and backfills documents written before search existed.
+    """
+    collections = {
+        "activities": (ACTIVITY_SEARCH_FIELDS, ACTIVITY_SUGGESTION_FIELDS),
+        "merchants": (MERCHANT_SEARCH_FIELDS, MERCHANT_SUGGESTION_FIELDS),
+    }
+    counts: Counter = Counter()
+    indexed = {}
+    for collection_name, (search_fields, suggestion_fields) in collections.items():
+        collection = database[collection_name]
+        projection = {"_id": 0, "id": 1, **{field: 1 for field in {*search_fields, *suggestion_fields}}}
+        updates = []
+        indexed[collection_name] = 0
+        async for doc in collection.find({}, projection):
+            counts.update(suggestion_terms(doc, suggestion_fields))
+            updates.append(UpdateOne({"id": doc["id"]}, {"$set": {"search_terms": document_terms(doc, search_fields)}}))
+            if len(updates) >= batch_size:
+                await collection.bulk_write(updates, ordered=False)
+                indexed[collection_name] += len(updates)
+                updates = []
+        if updates:
+            await collection.bulk_write(updates, ordered=False)
+            indexed[collection_name] += len(updates)
+
+    # Upsert the fresh counts under a new stamp, then drop terms the rebuild didn't see
+    rebuilt_at = datetime.utcnow()
+    terms = list(counts.items())
+    for start in range(0, len(terms), batch_size):
+        await database.search_suggestions.bulk_write([
+            UpdateOne(
+                {"term": term},
+                {"$set": {"count": count, "rebuilt_at": rebuilt_at}, "$setOnInsert": {"keys": suggestion_keys(term)}},
+                upsert=True
+            )
+            for term, count in terms[start:start + batch_size]
+        ], ordered=False)
+    removed = await database.search_suggestions.delete_many({"rebuilt_at": {"$ne": rebuilt_at}})
+    return {**indexed, "suggestions": len(terms), "suggestions_removed": removed.deleted_count}
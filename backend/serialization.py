@@ -0,0 +1,47 @@
+"""
+Fast response path: MongoDB documents encoded straight to JSON bytes, without building Pydantic models
+"""
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+class RowSerializer:
+    """Returns documents shaped like a response model without validating them through it.
+
+    MongoDB projects each document down to the model's fields, missing optional fields get the
+    model's defaults, and the rows go straight to orjson. The model still documents the response
+    in OpenAPI (via response_model=) and stays the contract the rows must match.
+    """
+
+    def __init__(self, model: Type[BaseModel], computed: Optional[Dict[str, Any]] = None):
+        self.model = model
+        # computed maps fields that don't exist on the document to the expressions that derive them
+        self.projection = {"_id": 0, **{name: 1 for name in model.model_fields}, **(computed or {})}
+        self.defaults = {
+            name: field.get_default(call_default_factory=True)
+            for name, field in model.model_fields.items()
+            if not field.is_required()
+        }
+
+    def row(self, doc: dict) -> dict:
+        return {**self.defaults, **doc}
+
+    def rows(self, docs: Iterable[dict]) -> List[dict]:
+        defaults = self.defaults
+        return [{**defaults, **doc} for doc in docs]
+
+def _default(value: Any):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(payload: Any) -> bytes:
+    return orjson.dumps(payload, default=_default)
+
+def json_response(payload: Any, status_code: int = 200) -> Response:
+    """Encode a payload of plain rows; returning a Response bypasses FastAPI's response_model pass"""
+    return Response(content=dumps(payload), status_code=status_code, media_type="application/json")
@@ -1,30 +1,128 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Response, WebSocket, status
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure
 import os
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional, Type, get_args
 import uuid
+import json
+from contextlib import asynccontextmanager
+import base64
+import binascii
 from datetime import datetime, timedelta
 import bcrypt
 import jwt
 from geopy.distance import geodesic
 import math
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from cache import FeedCache, TwoTierCache, close_redis, get_redis, invalidation_bus
+from realtime import MessageHub
+from scoring import InterestEncoder, score_candidates
+from interests import vocabulary as interest_vocabulary
+from sweeper import ExpirySweeper
+from geocoding import gazetteer
+from search import (
+    ACTIVITY_SEARCH_FIELDS, ACTIVITY_SUGGESTION_FIELDS, MERCHANT_SEARCH_FIELDS, MERCHANT_SUGGESTION_FIELDS,
+    document_terms, record_suggestions, stem, suggest, suggestion_terms, tokenize
+)
+from serialization import RowSerializer, dumps, json_response
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Number of server processes sharing this machine (set by gunicorn.conf.py)
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", 1))
+
 # MongoDB connection
+# Motor connects lazily, so creating the client here does no I/O; the lifespan below warms it up.
+# Compression is off by default: it costs CPU on both ends and only pays off over a real network hop.
+# Default pool sizes are per machine and split across workers, so adding workers doesn't multiply connections;
+# explicit MONGO_*_POOL_SIZE values are per worker.
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", max(1, 10 // WEB_CONCURRENCY)))
+MONGO_STARTUP_TIMEOUT = float(os.environ.get("MONGO_STARTUP_TIMEOUT", 60))
+mongo_options = {
+    "maxPoolSize": int(os.environ.get("MONGO_MAX_POOL_SIZE", max(1, 100 // WEB_CONCURRENCY))),
+    "minPoolSize": MONGO_MIN_POOL_SIZE,
+    "maxIdleTimeMS": int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", 300000)),
+    "connectTimeoutMS": int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", 5000)),
+    "serverSelectionTimeoutMS": int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000)),
+    "waitQueueTimeoutMS": int(os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5000)),
+}
+if os.environ.get("MONGO_SOCKET_TIMEOUT_MS"):
+    mongo_options["socketTimeoutMS"] = int(os.environ["MONGO_SOCKET_TIMEOUT_MS"])
+if os.environ.get("MONGO_COMPRESSORS"):
+    mongo_options["compressors"] = os.environ["MONGO_COMPRESSORS"]  # e.g. "zstd,snappy,zlib"
+client = AsyncIOMotorClient(mongo_url, **mongo_options)
 db = client[os.environ['DB_NAME']]
 
+# Application Lifespan
+async def warm_up(app: FastAPI):
+    """Wait for MongoDB, open the minimum pool, ensure indexes and load startup data, then mark the app ready"""
+    deadline = time.monotonic() + MONGO_STARTUP_TIMEOUT
+    while True:
+        try:
+            await client.admin.command("ping")
+            break
+        except Exception as e:
+            if time.monotonic() > deadline:
+                logger.error(f"MongoDB not reachable after {MONGO_STARTUP_TIMEOUT}s, giving up warm-up: {e}")
+                app.state.warm_up_error = str(e)
+                return
+            logger.warning(f"Waiting for MongoDB: {e}")
+            await asyncio.sleep(1)
+    
+    try:
+        # Concurrent pings check out (and so open) up to minPoolSize connections before traffic arrives
+        await asyncio.gather(*(client.admin.command("ping") for _ in range(MONGO_MIN_POOL_SIZE)))
+        app.state.index_report = await ensure_indexes(db)
+        interest_vocabulary.learn(await db.activities.distinct("interest_ids", {"date": {"$gte": datetime.utcnow()}}))
+    except Exception as e:
+        logger.error(f"Warm-up failed: {e}")
+        app.state.warm_up_error = str(e)
+        return
+    app.state.ready = True
+    await expiry_sweeper.start()
+    logger.info("Warm-up complete, ready for traffic")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    app.state.warm_up_error = None
+    app.state.index_report = None
+    # Warm-up runs in the background so the process starts immediately; /api/health/ready gates traffic
+    warm_up_task = asyncio.create_task(warm_up(app))
+    if WEB_CONCURRENCY > 1 and get_redis() is None:
+        logger.warning(
+            f"Running {WEB_CONCURRENCY} workers without REDIS_URL: caches are per worker and real-time "
+            "events only reach clients connected to the worker that published them"
+        )
+    await message_hub.start()
+    await invalidation_bus.start()
+    try:
+        yield
+    finally:
+        warm_up_task.cancel()
+        await expiry_sweeper.stop()
+        await invalidation_bus.stop()
+        await message_hub.stop()
+        client.close()
+        password_pool.shutdown()
+        await close_redis()
+
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -34,6 +132,41 @@ api_router = APIRouter(prefix="/api")
 async def root():
     return {"message": "FindBuddy API is running!", "status": "healthy"}
 
+@api_router.get("/health/ready")
+async def readiness():
+    """Ready once warm-up has finished and MongoDB answers a ping; 503 otherwise"""
+    if not app.state.ready:
+        return JSONResponse(status_code=503, content={
+            "status": "starting" if app.state.warm_up_error is None else "failed",
+            "error": app.state.warm_up_error
+        })
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(client.admin.command("ping"), timeout=2)
+    except Exception as e:
+        return JSONResponse(status_code=503, content={"status": "database_unavailable", "error": str(e)})
+    return {
+        "status": "ready",
+        "mongo_ping_ms": round((time.perf_counter() - started) * 1000, 2),
+        "mongo_pool": {"max_pool_size": mongo_options["maxPoolSize"], "min_pool_size": MONGO_MIN_POOL_SIZE},
+        "missing_indexes": app.state.index_report["missing"] if app.state.index_report else []
+    }
+
+@api_router.get("/metrics")
+async def get_metrics():
+    return {
+        "worker": {"pid": os.getpid(), "workers": WEB_CONCURRENCY},
+        "password_hashing": password_pool.stats(),
+        "principal_cache": {
+            "users": user_cache.stats(),
+            "merchants": merchant_cache.stats(),
+            "invalidations_relayed": invalidation_bus.received
+        },
+        "feed_cache": feed_cache.stats(),
+        "realtime": message_hub.stats(),
+        "expiry_sweeper": expiry_sweeper.stats()
+    }
+
 # JWT Configuration
 JWT_SECRET = "findbuddy_secret_key_2025"
 JWT_ALGORITHM = "HS256"
@@ -51,6 +184,14 @@ class UserCreate(BaseModel):
     bio: Optional[str] = ""
     interests: List[str] = []
 
+class UserUpdate(BaseModel):
+    name: Optional[str] = None
+    city: Optional[str] = None
+    phone: Optional[str] = None
+    bio: Optional[str] = None
+    interests: Optional[List[str]] = None
+    profile_photo: Optional[str] = None
+
 class UserLogin(BaseModel):
     email: str
     password: str
@@ -63,6 +204,7 @@ class User(BaseModel):
     phone: str
     bio: str
     interests: List[str]
+    interest_ids: List[str] = []
     created_at: datetime
     profile_photo: Optional[str] = None
 
@@ -77,6 +219,16 @@ class MerchantCreate(BaseModel):
     description: str
     website: Optional[str] = ""
 
+class MerchantUpdate(BaseModel):
+    business_name: Optional[str] = None
+    business_type: Optional[str] = None
+    address: Optional[str] = None
+    city: Optional[str] = None
+    phone: Optional[str] = None
+    description: Optional[str] = None
+    website: Optional[str] = None
+    logo: Optional[str] = None
+
 class MerchantLogin(BaseModel):
     email: str
     password: str
@@ -94,6 +246,8 @@ class Merchant(BaseModel):
     verified: bool = False
     created_at: datetime
     logo: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
 class DiscountOfferCreate(BaseModel):
     title: str
@@ -118,6 +272,21 @@ class DiscountOffer(BaseModel):
     current_redemptions: int = 0
     active: bool = True
     created_at: datetime
+    business_type: Optional[str] = None
+    city: Optional[str] = None
+
+class RedeemDiscountRequest(BaseModel):
+    discount_id: str
+    activity_id: str  # the buddy group redeeming is the activity's participants
+
+class DiscountRedemption(BaseModel):
+    id: str
+    discount_id: str
+    merchant_id: str
+    activity_id: str
+    redeemed_by: str
+    group_size: int
+    created_at: datetime
 
 class ActivityCreate(BaseModel):
     title: str
@@ -131,6 +300,14 @@ class ActivityCreate(BaseModel):
     category: str
     interests: List[str] = []
 
+class ActivitySocialStats(BaseModel):
+    like_count: int = 0
+    liked: bool = False
+    comment_count: int = 0
+
+class ActivityStatsRequest(BaseModel):
+    activity_ids: List[str] = Field(..., max_length=200)
+
 class Activity(BaseModel):
     id: str
     title: str
@@ -143,14 +320,70 @@ class Activity(BaseModel):
     max_participants: Optional[int]
     category: str
     interests: List[str]
+    interest_ids: List[str] = []
+    creator_id: str
+    creator_name: str
+    participant_count: int = 0
+    waitlist_count: int = 0
+    like_count: int = 0
+    comment_count: int = 0
+    created_at: datetime
+    distance_km: Optional[float] = None
+    stats: Optional[ActivitySocialStats] = None
+
+class ActivitySummary(BaseModel):
+    """Feed/list view of an activity: fixed size however many people join it"""
+    id: str
+    title: str
+    description_preview: str
+    date: datetime
+    location: str
+    city: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    max_participants: Optional[int] = None
+    category: str
+    interests: List[str] = []
     creator_id: str
     creator_name: str
-    participants: List[str] = []
-    interested_users: List[str] = []
+    participant_count: int = 0
+    waitlist_count: int = 0
+    like_count: int = 0
+    comment_count: int = 0
+    created_at: datetime
+    distance_km: Optional[float] = None
+    stats: Optional[ActivitySocialStats] = None
+
+class ActivityDetail(Activity):
+    is_participant: bool = False
+    membership_status: Optional[str] = None  # the caller's: participant, waitlisted or interested
+
+class ActivityMembership(BaseModel):
+    id: str
+    activity_id: str
+    user_id: str
+    role: str  # creator or member
+    status: str  # participant, waitlisted or interested
+    date: datetime  # the activity's date, so a user's memberships can be range-scanned by date
     created_at: datetime
 
 class JoinActivityRequest(BaseModel):
     activity_id: str
+    waitlist: bool = False  # join the waitlist instead of failing when the activity is full
+
+class LeaveActivityRequest(BaseModel):
+    activity_id: str
+
+class ScoreBreakdown(BaseModel):
+    interest: float
+    distance: float
+    recency: float
+    popularity: float
+    total: float
+
+class RecommendedActivity(BaseModel):
+    activity: ActivitySummary
+    score: ScoreBreakdown
 
 class ActivityComment(BaseModel):
     id: str
@@ -182,13 +415,251 @@ class Message(BaseModel):
     created_at: datetime
     read: bool = False
 
+class Conversation(BaseModel):
+    partner: Optional[User] = None  # None when the partner's account no longer exists
+    last_message: Message
+    unread_count: int = 0
+
+# Page Models
+# List endpoints return these through the RowSerializer fast path; they are declared as
+# response_model so OpenAPI still documents the shape
+class ActivityPage(BaseModel):
+    activities: List[ActivitySummary]
+    total_count: int
+    next_cursor: Optional[str] = None
+    city: Optional[str] = None
+    center: Optional[dict] = None
+    radius_km: Optional[float] = None
+
+class MatchingActivityPage(ActivityPage):
+    interest_ids: List[str] = []
+
+class MyActivitiesSection(BaseModel):
+    activities: List[ActivitySummary]
+    total_count: int
+    next_cursor: Optional[str] = None
+
+class MyActivities(BaseModel):
+    created_upcoming: MyActivitiesSection
+    created_past: MyActivitiesSection
+    joined_upcoming: MyActivitiesSection
+    joined_past: MyActivitiesSection
+
+class SearchActivity(ActivitySummary):
+    score: float
+
+class SearchMerchant(Merchant):
+    score: float
+
+class Suggestion(BaseModel):
+    term: str
+    count: int
+    distance: int  # edits between the typed prefix and the term; 0 is an exact prefix match
+
+class SearchResults(BaseModel):
+    query: str
+    engine: str  # text (MongoDB text indexes) or inverted (search_terms fallback)
+    activities: List[SearchActivity]
+    merchants: List[SearchMerchant]
+    suggestions: List[Suggestion]  # completions of the last word, also searched for
+
+class Autocomplete(BaseModel):
+    query: str
+    suggestions: List[Suggestion]
+
+class MembershipPage(BaseModel):
+    memberships: List[ActivityMembership]
+    participant_count: int
+    waitlist_count: int
+    next_cursor: Optional[str] = None
+
+class DiscountPage(BaseModel):
+    discounts: List[DiscountOffer]
+    total_count: int
+    next_cursor: Optional[str] = None
+
+class CommentPage(BaseModel):
+    comments: List[ActivityComment]
+    total_count: int
+    next_cursor: Optional[str] = None
+
+class LikePage(BaseModel):
+    likes: List[ActivityLike]
+    like_count: int
+    next_cursor: Optional[str] = None
+
+class MessagePage(BaseModel):
+    messages: List[Message]
+    next_cursor: Optional[str] = None
+
+class ConversationPage(BaseModel):
+    conversations: List[Conversation]
+    next_cursor: Optional[str] = None
+
+class RecommendationPage(BaseModel):
+    recommendations: List[RecommendedActivity]
+    candidate_count: int
+    weights: Dict[str, float]
+    took_ms: float
+
+class MerchantWithOffers(BaseModel):
+    merchant: Merchant
+    active_offers: List[DiscountOffer]
+    offers_count: int
+    distance_km: Optional[float] = None
+
+class MerchantPage(BaseModel):
+    merchants: List[MerchantWithOffers]
+    total_count: int
+    center: Optional[Dict[str, float]] = None
+    radius_km: float
+    next_cursor: Optional[str] = None
+
+DESCRIPTION_PREVIEW_LENGTH = 280
+
+activity_rows = RowSerializer(Activity)
+# Lists never decode the full description; MongoDB cuts the preview
+activity_summary_rows = RowSerializer(ActivitySummary, computed={
+    "description_preview": {"$substrCP": [{"$ifNull": ["$description", ""]}, 0, DESCRIPTION_PREVIEW_LENGTH]}
+})
+membership_rows = RowSerializer(ActivityMembership)
+search_activity_rows = RowSerializer(SearchActivity, computed=activity_summary_rows.projection)
+search_merchant_rows = RowSerializer(SearchMerchant)
+discount_rows = RowSerializer(DiscountOffer)
+comment_rows = RowSerializer(ActivityComment)
+like_rows = RowSerializer(ActivityLike)
+message_rows = RowSerializer(Message)
+merchant_rows = RowSerializer(Merchant)
+user_rows = RowSerializer(User)
+
 # Helper Functions
+def update_changes(update_data: BaseModel, model: Type[BaseModel]) -> dict:
+    """The fields a client set on a partial update; null may only clear fields the stored model allows to be null"""
+    changes = update_data.model_dump(exclude_unset=True)
+    not_nullable = sorted(
+        name for name, value in changes.items()
+        if value is None and type(None) not in get_args(model.model_fields[name].annotation)
+    )
+    if not_nullable:
+        raise HTTPException(status_code=400, detail=f"{', '.join(not_nullable)} cannot be null")
+    return changes
+
 def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
+# Password Hashing Pool
+# bcrypt burns 100-300ms of CPU per call, so it runs in a worker pool instead of on the event loop
+PASSWORD_HASH_EXECUTOR = os.environ.get("PASSWORD_HASH_EXECUTOR", "thread")  # "thread" or "process"
+# Split the cores between server processes so N workers don't each start a pool the size of the machine
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", max(1, (os.cpu_count() or 2) // WEB_CONCURRENCY)))
+PASSWORD_HASH_MAX_QUEUE = int(os.environ.get("PASSWORD_HASH_MAX_QUEUE", 200))
+
+class PasswordHashPool:
+    """Bounded executor for bcrypt work with queue-depth metrics"""
+    
+    def __init__(self, workers: int, executor_type: str = "thread", max_queue: int = 200):
+        if executor_type == "process":
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.executor_type = executor_type
+        self.workers = workers
+        self.max_queue = max_queue
+        self.semaphore = asyncio.Semaphore(workers)
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_queued = 0
+    
+    async def run(self, func, *args):
+        # Shed load instead of letting a login storm queue up unbounded work
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Server busy, please retry",
+                headers={"Retry-After": "1"}
+            )
+        
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.queued -= 1
+        
+        self.running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self.semaphore.release()
+    
+    def stats(self) -> dict:
+        return {
+            "executor": self.executor_type,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "max_queued": self.max_queued
+        }
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+password_pool = PasswordHashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_EXECUTOR, PASSWORD_HASH_MAX_QUEUE)
+
+async def hash_password_async(password: str) -> str:
+    return await password_pool.run(hash_password, password)
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await password_pool.run(verify_password, password, hashed)
+
+# Principal Cache
+# The JWT already proves identity, so the User/Merchant behind it is cached instead of loaded on every request.
+# Entries are invalidated on profile writes; the short local TTL bounds staleness on other workers.
+PRINCIPAL_CACHE_SIZE = int(os.environ.get("PRINCIPAL_CACHE_SIZE", 10000))
+PRINCIPAL_CACHE_TTL = float(os.environ.get("PRINCIPAL_CACHE_TTL", 30))
+PRINCIPAL_CACHE_REDIS_TTL = int(os.environ.get("PRINCIPAL_CACHE_REDIS_TTL", 300))
+
+user_cache = TwoTierCache(
+    prefix="principal:user",
+    encode=lambda user: user.model_dump_json(),
+    decode=User.model_validate_json,
+    maxsize=PRINCIPAL_CACHE_SIZE,
+    local_ttl=PRINCIPAL_CACHE_TTL,
+    redis_ttl=PRINCIPAL_CACHE_REDIS_TTL
+)
+merchant_cache = TwoTierCache(
+    prefix="principal:merchant",
+    encode=lambda merchant: merchant.model_dump_json(),
+    decode=Merchant.model_validate_json,
+    maxsize=PRINCIPAL_CACHE_SIZE,
+    local_ttl=PRINCIPAL_CACHE_TTL,
+    redis_ttl=PRINCIPAL_CACHE_REDIS_TTL
+)
+
+# Feed Cache
+# Everyone browsing a city gets the same feed page, so pages are built once and shared until a write
+# to that city (new activity, join, leave) bumps its version. A city_filter that only partially matches
+# a city (e.g. "San") is not invalidated by writes to "San Jose"; the TTL bounds how stale it can get.
+feed_cache = FeedCache(
+    prefix="feed:city",
+    ttl=float(os.environ.get("FEED_CACHE_TTL", 15)),
+    maxsize=int(os.environ.get("FEED_CACHE_SIZE", 1000))
+)
+
+def feed_scope(city: str) -> str:
+    return " ".join(city.lower().split())
+
 def create_jwt_token(user_id: str, user_type: str = "user") -> str:
     payload = {
         "user_id": user_id,
@@ -209,11 +680,17 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         if user_type == "merchant":
             raise HTTPException(status_code=401, detail="Merchant token not valid for user endpoints")
         
-        user_data = await db.users.find_one({"id": user_id})
+        cached_user = await user_cache.get(user_id)
+        if cached_user is not None:
+            return cached_user
+        
+        user_data = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
         if not user_data:
             raise HTTPException(status_code=401, detail="User not found")
         
-        return User(**user_data)
+        user = User(**user_data)
+        await user_cache.set(user_id, user)
+        return user
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.JWTError:
@@ -231,16 +708,94 @@ async def get_current_merchant(credentials: HTTPAuthorizationCredentials = Depen
         if user_type != "merchant":
             raise HTTPException(status_code=401, detail="User token not valid for merchant endpoints")
         
-        merchant_data = await db.merchants.find_one({"id": user_id})
+        cached_merchant = await merchant_cache.get(user_id)
+        if cached_merchant is not None:
+            return cached_merchant
+        
+        merchant_data = await db.merchants.find_one({"id": user_id}, {"_id": 0, "password": 0})
         if not merchant_data:
             raise HTTPException(status_code=401, detail="Merchant not found")
         
-        return Merchant(**merchant_data)
+        merchant = Merchant(**merchant_data)
+        await merchant_cache.set(user_id, merchant)
+        return merchant
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+def geo_point(latitude: Optional[float], longitude: Optional[float]) -> Optional[dict]:
+    """Build a GeoJSON point for 2dsphere queries (GeoJSON stores longitude first)"""
+    if latitude is None or longitude is None:
+        return None
+    return {"type": "Point", "coordinates": [longitude, latitude]}
+
+# Cursor Pagination
+# Opaque keyset cursors over (sort key, id): pages neither skip nor repeat rows and need no offset scans.
+# Each cursor names the field it was built on, so one from another listing (or another mode of the
+# same endpoint, e.g. city vs lat/lon) is rejected instead of being compared against the wrong values.
+MAX_PAGE_SIZE = 100
+
+def encode_cursor(sort_field: str, sort_value, item_id: str) -> str:
+    if isinstance(sort_value, datetime):
+        value = {"t": sort_value.isoformat()}
+    else:
+        value = {"n": sort_value}
+    raw = json.dumps([sort_field, value, item_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, sort_field: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        field, value, item_id = json.loads(raw)
+        sort_value = datetime.fromisoformat(value["t"]) if "t" in value else float(value["n"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if field != sort_field:
+        raise HTTPException(status_code=400, detail="Cursor belongs to a different listing")
+    return sort_value, str(item_id)
+
+def keyset_filter(
+    cursor: Optional[str],
+    sort_field: str = "created_at",
+    descending: bool = True,
+    id_field: str = "id"
+) -> dict:
+    """Filter selecting rows strictly after the cursor in (sort_field, id_field) order"""
+    if not cursor:
+        return {}
+    sort_value, item_id = decode_cursor(cursor, sort_field)
+    op = "$lt" if descending else "$gt"
+    return {"$or": [
+        {sort_field: {op: sort_value}},
+        {sort_field: sort_value, id_field: {op: item_id}}
+    ]}
+
+def with_keyset(query: dict, cursor: Optional[str], sort_field: str = "created_at", descending: bool = True) -> dict:
+    keyset = keyset_filter(cursor, sort_field, descending)
+    if not keyset:
+        return query
+    return {"$and": [query, keyset]} if query else keyset
+
+def keyset_sort(sort_field: str = "created_at", descending: bool = True) -> list:
+    direction = DESCENDING if descending else ASCENDING
+    return [(sort_field, direction), ("id", direction)]
+
+def paginate(rows: list, limit: int, sort_field: str = "created_at", id_field: str = "id") -> tuple:
+    """Trim a limit + 1 fetch to one page and build the cursor for the next page, if any"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(sort_field, rows[-1][sort_field], rows[-1][id_field])
+
+# Metres subtracted from a distance cursor: km -> m float rounding can land just past the boundary row,
+# which would skip rows tied with it; the keyset $match after $geoNear makes the exact cut
+GEO_CURSOR_SLACK_M = 0.01
+
+def geo_min_distance(cursor: str) -> float:
+    """$geoNear minDistance (metres) that resumes at, never after, a (distance_km, id) cursor"""
+    return max(0.0, decode_cursor(cursor, "distance_km")[0] * 1000 - GEO_CURSOR_SLACK_M)
+
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Calculate distance between two coordinates in kilometers"""
     return geodesic((lat1, lon1), (lat2, lon2)).kilometers
@@ -275,6 +830,303 @@ def calculate_interest_match_score(user_interests: List[str], activity_interests
     final_score = max(direct_score, partial_score)
     return min(1.0, final_score)  # Cap at 1.0
 
+# Recommendation Ranking
+RECOMMENDATION_WEIGHTS = {"interest": 0.45, "distance": 0.25, "recency": 0.15, "popularity": 0.15}
+RECOMMENDATION_CANDIDATE_LIMIT = int(os.environ.get("RECOMMENDATION_CANDIDATE_LIMIT", 2000))
+RECOMMENDATION_BUDGET_MS = float(os.environ.get("RECOMMENDATION_BUDGET_MS", 50))
+RECENCY_HALF_LIFE_HOURS = 72.0
+POPULARITY_SATURATION = 50  # participants + likes at which popularity scores 1.0
+
+async def get_liked_activity_ids(activity_ids: List[str], user_id: str) -> set:
+    """Which of these activities the user has liked (served by the unique (activity_id, user_id) index)"""
+    if not activity_ids:
+        return set()
+    likes = await db.activity_likes.find(
+        {"activity_id": {"$in": activity_ids}, "user_id": user_id},
+        {"_id": 0, "activity_id": 1}
+    ).to_list(None)
+    return {like["activity_id"] for like in likes}
+
+async def get_activity_social_stats(activity_ids: List[str], user_id: str) -> dict:
+    """Like counts, the caller's like state and comment counts for many activities.
+
+    Counts come from the denormalized counters on the activity documents, so this is one
+    query per collection instead of two requests per activity card.
+    """
+    stats = {activity_id: ActivitySocialStats() for activity_id in activity_ids}
+    if not activity_ids:
+        return stats
+    
+    counters, liked_ids = await asyncio.gather(
+        db.activities.find(
+            {"id": {"$in": activity_ids}},
+            {"_id": 0, "id": 1, "like_count": 1, "comment_count": 1}
+        ).to_list(None),
+        get_liked_activity_ids(activity_ids, user_id)
+    )
+    
+    for counter in counters:
+        stats[counter["id"]].like_count = counter.get("like_count", 0)
+        stats[counter["id"]].comment_count = counter.get("comment_count", 0)
+    for activity_id in liked_ids:
+        stats[activity_id].liked = True
+    
+    return stats
+
+async def attach_social_stats_to_rows(rows: List[dict], user_id: str) -> List[dict]:
+    """Stats for fast-path rows: the rows already carry their counters, so only the caller's likes are queried"""
+    liked_ids = await get_liked_activity_ids([row["id"] for row in rows], user_id)
+    for row in rows:
+        row["stats"] = {
+            "like_count": row.get("like_count", 0),
+            "liked": row["id"] in liked_ids,
+            "comment_count": row.get("comment_count", 0)
+        }
+    return rows
+
+async def reconcile_activity_counters(database, batch_size: int = 500) -> int:
+    """Repair drift between the activity counters and the likes, comments and memberships collections.
+
+    Walks activities in id order in bounded batches and returns the number of activities fixed.
+    """
+    repaired = 0
+    last_id = None
+    
+    while True:
+        query = {"id": {"$gt": last_id}} if last_id else {}
+        batch = await database.activities.find(
+            query, {"_id": 0, "id": 1, "like_count": 1, "comment_count": 1, "participant_count": 1, "waitlist_count": 1}
+        ).sort("id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["id"]
+        
+        activity_ids = [activity["id"] for activity in batch]
+        count_pipeline = [
+            {"$match": {"activity_id": {"$in": activity_ids}}},
+            {"$group": {"_id": "$activity_id", "count": {"$sum": 1}}}
+        ]
+        membership_pipeline = [
+            {"$match": {"activity_id": {"$in": activity_ids}}},
+            {"$group": {"_id": {"activity_id": "$activity_id", "status": "$status"}, "count": {"$sum": 1}}}
+        ]
+        like_rows, comment_rows, membership_rows = await asyncio.gather(
+            database.activity_likes.aggregate(count_pipeline).to_list(None),
+            database.activity_comments.aggregate(count_pipeline).to_list(None),
+            database.activity_memberships.aggregate(membership_pipeline).to_list(None)
+        )
+        like_counts = {row["_id"]: row["count"] for row in like_rows}
+        comment_counts = {row["_id"]: row["count"] for row in comment_rows}
+        membership_counts = {(row["_id"]["activity_id"], row["_id"]["status"]): row["count"] for row in membership_rows}
+        
+        updates = []
+        for activity in batch:
+            expected = {
+                "like_count": like_counts.get(activity["id"], 0),
+                "comment_count": comment_counts.get(activity["id"], 0),
+                "participant_count": membership_counts.get((activity["id"], "participant"), 0),
+                "waitlist_count": membership_counts.get((activity["id"], "waitlisted"), 0)
+            }
+            if any(activity.get(field) != value for field, value in expected.items()):
+                updates.append(UpdateOne({"id": activity["id"]}, {"$set": expected}))
+        if updates:
+            await database.activities.bulk_write(updates, ordered=False)
+            repaired += len(updates)
+    
+    return repaired
+
+# Database Indexes
+# Every query the API runs should be served by one of these. Keep this in sync when adding queries.
+INDEX_SPECS = {
+    "users": [
+        IndexModel([("id", ASCENDING)], name="users_id", unique=True),
+        IndexModel([("email", ASCENDING)], name="users_email", unique=True),
+    ],
+    "merchants": [
+        IndexModel([("id", ASCENDING)], name="merchants_id", unique=True),
+        IndexModel([("email", ASCENDING)], name="merchants_email", unique=True),
+        IndexModel([("city", ASCENDING), ("business_type", ASCENDING)], name="merchants_city_business_type"),
+        IndexModel([("geo", "2dsphere")], name="merchants_geo_2dsphere"),
+        # near-me outside the gazetteer: newest first, filtered by city name along the way
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="merchants_created_at_id"),
+        # /search: weighted text index, and the search_terms inverted index used when $text isn't available
+        IndexModel(
+            [("business_name", TEXT), ("business_type", TEXT), ("description", TEXT)],
+            name="merchants_text", weights={"business_name": 10, "business_type": 5, "description": 1}
+        ),
+        IndexModel([("search_terms", ASCENDING)], name="merchants_search_terms"),
+    ],
+    "activities": [
+        IndexModel([("id", ASCENDING)], name="activities_id", unique=True),
+        IndexModel([("geo", "2dsphere")], name="activities_geo_2dsphere"),
+        IndexModel([("city", ASCENDING), ("date", ASCENDING)], name="activities_city_date"),
+        IndexModel([("creator_id", ASCENDING)], name="activities_creator_id"),
+        # City feed: newest first, filtered by city name along the way
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="activities_created_at_id"),
+        # Inverted index: one posting list of upcoming activities per canonical interest id
+        IndexModel(
+            [("interest_ids", ASCENDING), ("date", ASCENDING), ("id", ASCENDING)],
+            name="activities_interest_ids_date_id"
+        ),
+        # Lets the expiry sweeper find the oldest activities without a collection scan
+        IndexModel([("date", ASCENDING)], name="activities_date"),
+        # /search: weighted text index, and the search_terms inverted index used when $text isn't available
+        IndexModel(
+            [("title", TEXT), ("category", TEXT), ("interests", TEXT), ("description", TEXT)],
+            name="activities_text", weights={"title": 10, "category": 5, "interests": 5, "description": 1}
+        ),
+        IndexModel([("search_terms", ASCENDING), ("date", ASCENDING)], name="activities_search_terms_date"),
+    ],
+    "activities_archive": [
+        IndexModel([("id", ASCENDING)], name="activities_archive_id", unique=True),
+        IndexModel([("creator_id", ASCENDING)], name="activities_archive_creator_id"),
+    ],
+    "search_suggestions": [
+        IndexModel([("term", ASCENDING)], name="search_suggestions_term", unique=True),
+        # Autocomplete: the most used terms under each prefix (and one-typo variant) key
+        IndexModel([("keys", ASCENDING), ("count", DESCENDING)], name="search_suggestions_keys_count"),
+    ],
+    "activity_memberships": [
+        # One membership per user per activity; also serves lookups by activity_id alone
+        IndexModel(
+            [("activity_id", ASCENDING), ("user_id", ASCENDING)],
+            name="activity_memberships_activity_id_user_id", unique=True
+        ),
+        # Waitlist order and paged participant lists
+        IndexModel(
+            [("activity_id", ASCENDING), ("status", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)],
+            name="activity_memberships_activity_id_status_created_at_id"
+        ),
+        # "My activities": one user's seats, grouped by created/joined and ordered by activity date
+        IndexModel(
+            [("user_id", ASCENDING), ("status", ASCENDING), ("role", ASCENDING), ("date", ASCENDING)],
+            name="activity_memberships_user_id_status_role_date"
+        ),
+    ],
+    "activity_memberships_archive": [
+        IndexModel([("user_id", ASCENDING), ("date", ASCENDING)], name="activity_memberships_archive_user_id_date"),
+    ],
+    "activity_likes_archive": [
+        IndexModel([("activity_id", ASCENDING)], name="activity_likes_archive_activity_id"),
+    ],
+    "activity_comments_archive": [
+        IndexModel([("activity_id", ASCENDING)], name="activity_comments_archive_activity_id"),
+    ],
+    "discount_offers": [
+        IndexModel([("id", ASCENDING)], name="discount_offers_id", unique=True),
+        # A merchant's offers, newest first; also serves updates by merchant_id
+        IndexModel(
+            [("merchant_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="discount_offers_merchant_id_created_at_id"
+        ),
+        IndexModel(
+            [("active", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING), ("valid_until", ASCENDING)],
+            name="discount_offers_active_created_at_id_valid_until"
+        ),
+        # Equality, sort, then range: filtered pages come off the index already in (created_at, id) order
+        IndexModel(
+            [
+                ("active", ASCENDING), ("business_type", ASCENDING),
+                ("created_at", DESCENDING), ("id", DESCENDING), ("valid_until", ASCENDING)
+            ],
+            name="discount_offers_active_business_type_created_at_id_valid_until"
+        ),
+    ],
+    "discount_redemptions": [
+        # One redemption per offer per buddy group: the unique key is what makes redeeming idempotent
+        IndexModel(
+            [("discount_id", ASCENDING), ("activity_id", ASCENDING)],
+            name="discount_redemptions_discount_id_activity_id", unique=True
+        ),
+    ],
+    "activity_comments": [
+        IndexModel(
+            [("activity_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)],
+            name="activity_comments_activity_id_created_at_id"
+        ),
+    ],
+    "activity_likes": [
+        IndexModel([("activity_id", ASCENDING), ("user_id", ASCENDING)], name="activity_likes_activity_id_user_id", unique=True),
+        IndexModel(
+            [("activity_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="activity_likes_activity_id_created_at_id"
+        ),
+    ],
+    "messages": [
+        # Inbox: each $or branch walks one of these already in (created_at, id) order, so the
+        # server merge-sorts the two instead of sorting every message the user ever exchanged
+        IndexModel(
+            [("sender_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="messages_sender_id_created_at_id"
+        ),
+        IndexModel(
+            [("recipient_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="messages_recipient_id_created_at_id"
+        ),
+        # Per-thread history and unread counts for one partner
+        IndexModel(
+            [("sender_id", ASCENDING), ("recipient_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="messages_sender_id_recipient_id_created_at_id"
+        ),
+        IndexModel(
+            [("recipient_id", ASCENDING), ("sender_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="messages_recipient_id_sender_id_created_at_id"
+        ),
+    ],
+}
+
+async def ensure_indexes(database) -> dict:
+    """Create every declared index and report missing, undeclared and unused ones"""
+    report = {"created": [], "missing": [], "undeclared": [], "unused": []}
+    
+    for collection_name, indexes in INDEX_SPECS.items():
+        collection = database[collection_name]
+        
+        # One index at a time so a single failure (e.g. duplicates blocking a unique index) doesn't block the rest
+        for index in indexes:
+            name = index.document["name"]
+            try:
+                await collection.create_indexes([index])
+                report["created"].append(f"{collection_name}.{name}")
+            except OperationFailure as e:
+                logger.error(f"Could not create index {collection_name}.{name}: {e}")
+        
+        existing = await collection.index_information()
+        declared = {index.document["name"] for index in indexes}
+        report["missing"].extend(f"{collection_name}.{name}" for name in declared - set(existing))
+        report["undeclared"].extend(
+            f"{collection_name}.{name}" for name in set(existing) - declared if name != "_id_"
+        )
+        
+        # $indexStats counters reset when mongod restarts, so "unused" means unused since then
+        try:
+            async for stats in collection.aggregate([{"$indexStats": {}}]):
+                if stats["name"] != "_id_" and stats["accesses"]["ops"] == 0:
+                    report["unused"].append(f"{collection_name}.{stats['name']}")
+        except OperationFailure as e:
+            logger.warning(f"Could not read $indexStats for {collection_name}: {e}")
+    
+    if report["missing"]:
+        logger.error(f"Missing indexes: {', '.join(sorted(report['missing']))}")
+    if report["undeclared"]:
+        logger.warning(f"Indexes not declared in INDEX_SPECS: {', '.join(sorted(report['undeclared']))}")
+    if report["unused"]:
+        logger.info(f"Indexes with no recorded use: {', '.join(sorted(report['unused']))}")
+    logger.info(f"Index bootstrap complete: {len(report['created'])} indexes ensured")
+    
+    return report
+
+# Expiry Sweeper
+# Expired offers are switched off and activities older than ACTIVITY_ARCHIVE_AFTER_DAYS move, with their
+# likes and comments, to *_archive collections, keeping the hot collections and their indexes small.
+expiry_sweeper = ExpirySweeper(
+    db,
+    interval=float(os.environ.get("EXPIRY_SWEEP_INTERVAL", 300)),
+    batch_size=int(os.environ.get("EXPIRY_SWEEP_BATCH_SIZE", 500)),
+    max_batches=int(os.environ.get("EXPIRY_SWEEP_MAX_BATCHES", 20)),
+    archive_after=timedelta(days=float(os.environ.get("ACTIVITY_ARCHIVE_AFTER_DAYS", 30)))
+)
+
 # User Authentication Routes
 @api_router.post("/auth/register")
 async def register_user(user_data: UserCreate):
@@ -284,7 +1136,7 @@ async def register_user(user_data: UserCreate):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Hash password and create user
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password_async(user_data.password)
     user_id = str(uuid.uuid4())
     
     user_doc = {
@@ -296,11 +1148,15 @@ async def register_user(user_data: UserCreate):
         "phone": user_data.phone,
         "bio": user_data.bio,
         "interests": user_data.interests,
+        "interest_ids": interest_vocabulary.resolve_many(user_data.interests),
         "created_at": datetime.utcnow(),
         "profile_photo": None
     }
     
-    await db.users.insert_one(user_doc)
+    try:
+        await db.users.insert_one(user_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create JWT token
     token = create_jwt_token(user_id, "user")
@@ -314,7 +1170,7 @@ async def register_user(user_data: UserCreate):
 @api_router.post("/auth/login")
 async def login_user(credentials: UserLogin):
     user_data = await db.users.find_one({"email": credentials.email})
-    if not user_data or not verify_password(credentials.password, user_data["password"]):
+    if not user_data or not await verify_password_async(credentials.password, user_data["password"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     token = create_jwt_token(user_data["id"], "user")
@@ -329,7 +1185,48 @@ async def login_user(credentials: UserLogin):
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
     return current_user
 
+@api_router.put("/auth/me")
+async def update_current_user(update_data: UserUpdate, current_user: User = Depends(get_current_user)):
+    changes = update_changes(update_data, User)
+    if not changes:
+        return current_user
+    if changes.get("interests") is not None:
+        changes["interest_ids"] = interest_vocabulary.resolve_many(changes["interests"])
+    
+    user_data = await db.users.find_one_and_update(
+        {"id": current_user.id},
+        {"$set": changes},
+        projection={"_id": 0, "password": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    await user_cache.invalidate(current_user.id)
+    
+    return User(**user_data)
+
 # Merchant Authentication Routes
+def normalize_business_type(business_type: str) -> str:
+    return " ".join(business_type.lower().split())
+
+def offer_merchant_fields(merchant: dict) -> dict:
+    """Merchant fields copied onto each of its discount offers so offer browsing never joins back"""
+    fields = {
+        "merchant_name": merchant["business_name"],
+        "business_type": normalize_business_type(merchant["business_type"]),
+        "city": merchant["city"]
+    }
+    point = geo_point(merchant.get("latitude"), merchant.get("longitude"))
+    if point:
+        fields["geo"] = point
+    return fields
+
+def geocode_merchant(address: str, city: str) -> dict:
+    """Coordinates and GeoJSON point for a merchant from the local gazetteer (empty when the place is unknown)"""
+    location = gazetteer.geocode(address, city)
+    if location is None:
+        return {"latitude": None, "longitude": None}
+    latitude, longitude = location
+    return {"latitude": latitude, "longitude": longitude, "geo": geo_point(latitude, longitude)}
+
 @api_router.post("/merchants/register")
 async def register_merchant(merchant_data: MerchantCreate):
     # Check if merchant already exists
@@ -338,7 +1235,7 @@ async def register_merchant(merchant_data: MerchantCreate):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Hash password and create merchant
-    hashed_password = hash_password(merchant_data.password)
+    hashed_password = await hash_password_async(merchant_data.password)
     merchant_id = str(uuid.uuid4())
     
     merchant_doc = {
@@ -356,8 +1253,14 @@ async def register_merchant(merchant_data: MerchantCreate):
         "created_at": datetime.utcnow(),
         "logo": None
     }
+    merchant_doc.update(geocode_merchant(merchant_data.address, merchant_data.city))
+    merchant_doc["search_terms"] = document_terms(merchant_doc, MERCHANT_SEARCH_FIELDS)
     
-    await db.merchants.insert_one(merchant_doc)
+    try:
+        await db.merchants.insert_one(merchant_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    await record_suggestions(db, suggestion_terms(merchant_doc, MERCHANT_SUGGESTION_FIELDS))
     
     # Create JWT token
     token = create_jwt_token(merchant_id, "merchant")
@@ -371,7 +1274,7 @@ async def register_merchant(merchant_data: MerchantCreate):
 @api_router.post("/merchants/login")
 async def login_merchant(credentials: MerchantLogin):
     merchant_data = await db.merchants.find_one({"email": credentials.email})
-    if not merchant_data or not verify_password(credentials.password, merchant_data["password"]):
+    if not merchant_data or not await verify_password_async(credentials.password, merchant_data["password"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     token = create_jwt_token(merchant_data["id"], "merchant")
@@ -386,7 +1289,59 @@ async def login_merchant(credentials: MerchantLogin):
 async def get_current_merchant_info(current_merchant: Merchant = Depends(get_current_merchant)):
     return current_merchant
 
+@api_router.put("/merchants/me")
+async def update_current_merchant(
+    update_data: MerchantUpdate,
+    current_merchant: Merchant = Depends(get_current_merchant)
+):
+    changes = update_changes(update_data, Merchant)
+    if not changes:
+        return current_merchant
+    update = {"$set": changes}
+    if "address" in changes or "city" in changes:
+        changes.update(geocode_merchant(
+            changes.get("address", current_merchant.address), changes.get("city", current_merchant.city)
+        ))
+        if "geo" not in changes:
+            # A place the gazetteer doesn't know drops the merchant out of near-me rather than leaving a stale point
+            update["$unset"] = {"geo": ""}
+    if any(field in changes for field in MERCHANT_SEARCH_FIELDS):
+        merged = {**current_merchant.model_dump(), **changes}
+        changes["search_terms"] = document_terms(merged, MERCHANT_SEARCH_FIELDS)
+        old_terms = suggestion_terms(current_merchant.model_dump(), MERCHANT_SUGGESTION_FIELDS)
+        new_terms = suggestion_terms(merged, MERCHANT_SUGGESTION_FIELDS)
+        await record_suggestions(db, new_terms - old_terms)
+        await record_suggestions(db, old_terms - new_terms, increment=-1)
+    
+    merchant_data = await db.merchants.find_one_and_update(
+        {"id": current_merchant.id},
+        update,
+        projection={"_id": 0, "password": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    await merchant_cache.invalidate(current_merchant.id)
+    
+    offer_fields = offer_merchant_fields(merchant_data)
+    if any(field in changes for field in ("business_name", "business_type", "city", "latitude")):
+        await db.discount_offers.update_many(
+            {"merchant_id": current_merchant.id},
+            {"$set": offer_fields} if offer_fields.get("geo") else {"$set": offer_fields, "$unset": {"geo": ""}}
+        )
+    
+    return Merchant(**merchant_data)
+
 # Activity Routes (Updated for "Activities Around Me")
+def membership_doc(activity: dict, user_id: str, role: str = "member", status: str = "participant") -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "activity_id": activity["id"],
+        "user_id": user_id,
+        "role": role,
+        "status": status,
+        "date": activity["date"],
+        "created_at": datetime.utcnow()
+    }
+
 @api_router.post("/activities")
 async def create_activity(activity_data: ActivityCreate, current_user: User = Depends(get_current_user)):
     activity_id = str(uuid.uuid4())
@@ -403,81 +1358,507 @@ async def create_activity(activity_data: ActivityCreate, current_user: User = De
         "max_participants": activity_data.max_participants,
         "category": activity_data.category,
         "interests": activity_data.interests,
+        "interest_ids": interest_vocabulary.resolve_many(activity_data.interests),
         "creator_id": current_user.id,
         "creator_name": current_user.name,
-        "participants": [current_user.id],
-        "interested_users": [],
+        "participant_count": 1,
+        "waitlist_count": 0,
+        "like_count": 0,
+        "comment_count": 0,
         "created_at": datetime.utcnow()
     }
     
+    point = geo_point(activity_data.latitude, activity_data.longitude)
+    if point:
+        activity_doc["geo"] = point
+    activity_doc["search_terms"] = document_terms(activity_doc, ACTIVITY_SEARCH_FIELDS)
+    
     await db.activities.insert_one(activity_doc)
+    await db.activity_memberships.insert_one(
+        membership_doc(activity_doc, current_user.id, role="creator", status="participant")
+    )
+    await record_suggestions(db, suggestion_terms(activity_doc, ACTIVITY_SUGGESTION_FIELDS))
+    await feed_cache.invalidate(feed_scope(activity_data.city))
     
     return {
         "message": "Activity created successfully",
         "activity": Activity(**activity_doc)
     }
 
-@api_router.get("/activities/around-me")
+@api_router.get("/activities/around-me", response_model=ActivityPage)
 async def get_activities_around_me(
     current_user: User = Depends(get_current_user),
-    limit: int = 50,
-    city_filter: Optional[str] = None
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    city_filter: Optional[str] = None,
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: float = Query(25.0, gt=0, le=500),
+    include_stats: bool = False
 ):
-    """Get all activities in the area (not personalized)"""
+    """Get upcoming activities nearest-first around a point, or in a city when no point is given"""
     query = {"date": {"$gte": datetime.utcnow()}}
     
+    if (lat is None) != (lon is None):
+        raise HTTPException(status_code=400, detail="lat and lon must be provided together")
+    
+    if lat is not None:
+        # $geoNear uses the 2dsphere index on "geo"; nearest-first pages are keyed on (distance_km, id)
+        geo_near = {
+            "near": geo_point(lat, lon),
+            "key": "geo",
+            "distanceField": "distance_km",
+            "distanceMultiplier": 0.001,
+            "maxDistance": radius_km * 1000,
+            "spherical": True,
+            "query": query
+        }
+        if cursor:
+            geo_near["minDistance"] = geo_min_distance(cursor)
+        pipeline = [
+            {"$geoNear": geo_near},
+            {"$match": keyset_filter(cursor, "distance_km", descending=False)},
+            {"$sort": {"distance_km": 1, "id": 1}},
+            {"$limit": limit + 1},
+            {"$project": activity_summary_rows.projection}
+        ]
+        activities_data, next_cursor = paginate(
+            await db.activities.aggregate(pipeline).to_list(limit + 1), limit, "distance_km"
+        )
+        activities = activity_summary_rows.rows(activities_data)
+        if include_stats:
+            await attach_social_stats_to_rows(activities, current_user.id)
+        
+        return json_response({
+            "activities": activities,
+            "total_count": len(activities),
+            "center": {"lat": lat, "lon": lon},
+            "radius_km": radius_km,
+            "next_cursor": next_cursor
+        })
+    
     # Filter by city if specified, otherwise use user's city
     target_city = city_filter or current_user.city
     query["city"] = {"$regex": target_city, "$options": "i"}
     
-    activities_cursor = db.activities.find(query).sort("created_at", -1)
-    activities_data = await activities_cursor.to_list(limit)
+    async def build_page() -> bytes:
+        activities_cursor = db.activities.find(
+            with_keyset(query, cursor), activity_summary_rows.projection
+        ).sort(keyset_sort()).limit(limit + 1)
+        activities_data, next_cursor = paginate(await activities_cursor.to_list(limit + 1), limit)
+        return dumps({
+            "activities": activity_summary_rows.rows(activities_data),
+            "total_count": len(activities_data),
+            "city": target_city,
+            "next_cursor": next_cursor
+        })
     
-    return {
-        "activities": [Activity(**activity) for activity in activities_data],
-        "total_count": len(activities_data),
-        "city": target_city
+    page = await feed_cache.get_or_fill(
+        feed_scope(target_city), f"{target_city}:{limit}:{cursor or ''}", build_page
+    )
+    if not include_stats:
+        return Response(content=page, media_type="application/json")
+    
+    # The shared page already carries the counters (at most one TTL old); only the caller's likes are fetched
+    payload = json.loads(page)
+    await attach_social_stats_to_rows(payload["activities"], current_user.id)
+    return json_response(payload)
+
+@api_router.get("/activities/recommended", response_model=RecommendationPage)
+async def get_recommended_activities(
+    current_user: User = Depends(get_current_user),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: float = Query(25.0, gt=0, le=500),
+    days_ahead: int = Query(30, ge=1, le=365)
+):
+    """Upcoming activities ranked for the user by interest match, distance, recency and popularity"""
+    if (lat is None) != (lon is None):
+        raise HTTPException(status_code=400, detail="lat and lon must be provided together")
+    
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    date_window = {"date": {"$gte": now, "$lte": now + timedelta(days=days_ahead)}}
+    
+    # Candidates come from the geo or (city, date) index; only the fields scoring needs are decoded
+    scoring_fields = {
+        "_id": 0, "id": 1, "interest_ids": 1, "latitude": 1, "longitude": 1, "created_at": 1, "like_count": 1,
+        "participant_count": 1
+    }
+    if lat is not None:
+        prefilter = {"$geoNear": {
+            "near": geo_point(lat, lon),
+            "key": "geo",
+            "distanceField": "distance_km",
+            "distanceMultiplier": 0.001,
+            "maxDistance": radius_km * 1000,
+            "spherical": True,
+            "query": date_window
+        }}
+        scoring_fields["distance_km"] = 1
+    else:
+        prefilter = {"$match": {**date_window, "city": {"$regex": current_user.city, "$options": "i"}}}
+    pipeline = [prefilter, {"$limit": RECOMMENDATION_CANDIDATE_LIMIT}, {"$project": scoring_fields}]
+    if lat is None:
+        # Soonest activities first when the candidate cap cuts the city's list short
+        pipeline.insert(1, {"$sort": {"date": 1}})
+    candidates = await db.activities.aggregate(pipeline).to_list(RECOMMENDATION_CANDIDATE_LIMIT)
+    
+    # All candidates are scored in one vectorized pass; only the top page is materialized. Partial
+    # matches follow the canonical vocabulary, the same whole-word rule /activities/matching-interests uses
+    user_interest_ids = current_user.interest_ids or interest_vocabulary.resolve_many(current_user.interests)
+    scores = score_candidates(
+        candidates,
+        user_interest_ids,
+        now,
+        radius_km,
+        RECOMMENDATION_WEIGHTS,
+        origin=(lat, lon) if lat is not None else None,
+        recency_half_life_hours=RECENCY_HALF_LIFE_HOURS,
+        popularity_saturation=POPULARITY_SATURATION,
+        encoder=InterestEncoder(related=interest_vocabulary.related),
+        interest_field="interest_ids"
+    )
+    top = np.argsort(-scores["total"], kind="stable")[:limit]
+    scored = [
+        ({component: round(float(values[i]), 4) for component, values in scores.items()}, candidates[i])
+        for i in top
+    ]
+    
+    # Summaries only for the page being returned
+    top_ids = [candidate["id"] for _, candidate in scored]
+    documents = {
+        activity["id"]: activity
+        for activity in await db.activities.find(
+            {"id": {"$in": top_ids}}, activity_summary_rows.projection
+        ).to_list(len(top_ids))
     }
+    recommendations = [
+        {
+            "activity": activity_summary_rows.row({**documents[candidate["id"]], "distance_km": candidate.get("distance_km")}),
+            "score": score
+        }
+        for score, candidate in scored
+        if candidate["id"] in documents
+    ]
+    
+    took_ms = (time.perf_counter() - started) * 1000
+    if took_ms > RECOMMENDATION_BUDGET_MS:
+        logger.warning(f"Recommendations took {took_ms:.1f}ms for {len(candidates)} candidates")
+    
+    return json_response({
+        "recommendations": recommendations,
+        "candidate_count": len(candidates),
+        "weights": RECOMMENDATION_WEIGHTS,
+        "took_ms": round(took_ms, 2)
+    })
+
+@api_router.get("/activities/matching-interests", response_model=MatchingActivityPage)
+async def get_activities_matching_interests(
+    current_user: User = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """Upcoming activities sharing at least one (partially matching) interest with the user, soonest first"""
+    user_interest_ids = current_user.interest_ids or interest_vocabulary.resolve_many(current_user.interests)
+    expanded_ids = interest_vocabulary.expand(user_interest_ids)
+    if not expanded_ids:
+        return {"activities": [], "total_count": 0, "interest_ids": [], "next_cursor": None}
+    
+    # Union of the interests' posting lists in the (interest_ids, date) index, not a scan of every activity
+    query = {"interest_ids": {"$in": expanded_ids}, "date": {"$gte": datetime.utcnow()}}
+    activities_cursor = db.activities.find(
+        with_keyset(query, cursor, "date", descending=False), activity_summary_rows.projection
+    ).sort(keyset_sort("date", descending=False)).limit(limit + 1)
+    activities_data, next_cursor = paginate(await activities_cursor.to_list(limit + 1), limit, "date")
+    
+    return json_response({
+        "activities": activity_summary_rows.rows(activities_data),
+        "total_count": len(activities_data),
+        "interest_ids": expanded_ids,
+        "next_cursor": next_cursor
+    })
+
+# An activity has room when it has no cap (None or 0) or fewer participants than the cap
+HAS_CAPACITY = {"$or": [
+    {"max_participants": {"$in": [None, 0]}},
+    {"$expr": {"$lt": ["$participant_count", "$max_participants"]}}
+]}
+JOIN_PROJECTION = {
+    "_id": 0, "id": 1, "city": 1, "date": 1, "participant_count": 1, "waitlist_count": 1, "max_participants": 1
+}
+
+async def waitlist_position(activity_id: str, membership: dict) -> int:
+    return await db.activity_memberships.count_documents({
+        "activity_id": activity_id,
+        "status": "waitlisted",
+        "created_at": {"$lte": membership["created_at"]}
+    })
 
 @api_router.post("/activities/join")
 async def join_activity(request: JoinActivityRequest, current_user: User = Depends(get_current_user)):
-    activity = await db.activities.find_one({"id": request.activity_id})
+    activity = await db.activities.find_one({"id": request.activity_id}, JOIN_PROJECTION)
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
     
-    # Check if user is already a participant
-    if current_user.id in activity["participants"]:
+    # The membership is claimed first (the unique (activity_id, user_id) index settles duplicates), and
+    # only then a seat taken, so a double-submitted join never holds a seat other users are turned away for
+    existing = await db.activity_memberships.find_one(
+        {"activity_id": request.activity_id, "user_id": current_user.id}, {"_id": 0}
+    )
+    if existing and existing["status"] == "participant":
         raise HTTPException(status_code=400, detail="Already joined this activity")
+    if existing:
+        # Waitlisted (or interested) users take the seat through their existing membership
+        claimed = await db.activity_memberships.find_one_and_update(
+            {"id": existing["id"], "status": existing["status"]},
+            {"$set": {"status": "participant"}}
+        )
+        if not claimed:
+            raise HTTPException(status_code=400, detail="Already joined this activity")
+    else:
+        membership = membership_doc(activity, current_user.id)
+        try:
+            await db.activity_memberships.insert_one(membership)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="Already joined this activity")
     
-    # Check if activity is full
-    if activity.get("max_participants") and len(activity["participants"]) >= activity["max_participants"]:
+    # A seat is taken by a conditional $inc on the counter, so concurrent joins can never oversubscribe
+    seat = {"participant_count": 1}
+    if existing and existing["status"] == "waitlisted":
+        seat["waitlist_count"] = -1
+    seated = await db.activities.find_one_and_update(
+        {"id": request.activity_id, **HAS_CAPACITY},
+        {"$inc": seat},
+        projection=JOIN_PROJECTION,
+        return_document=ReturnDocument.AFTER
+    )
+    if seated:
+        if existing:
+            await db.activity_memberships.update_one(
+                {"id": existing["id"]}, {"$set": {"created_at": datetime.utcnow()}}
+            )
+        await feed_cache.invalidate(feed_scope(seated["city"]))
+        return {
+            "message": "Successfully joined activity",
+            "status": "joined",
+            "participant_count": seated["participant_count"],
+            "max_participants": seated.get("max_participants")
+        }
+    
+    # No seat left: give the claim back, or turn it into a waitlist entry
+    if existing:
+        membership = await db.activity_memberships.find_one_and_update(
+            {"id": existing["id"]}, {"$set": {"status": existing["status"]}}, return_document=ReturnDocument.AFTER
+        )
+    if not request.waitlist:
+        if not existing:
+            await db.activity_memberships.delete_one({"id": membership["id"]})
         raise HTTPException(status_code=400, detail="Activity is full")
+    if existing and existing["status"] == "waitlisted":
+        return {
+            "message": "Already on the waitlist",
+            "status": "waitlisted",
+            "waitlist_position": await waitlist_position(request.activity_id, membership),
+            "participant_count": activity["participant_count"],
+            "max_participants": activity.get("max_participants")
+        }
     
-    # Add user to participants
-    await db.activities.update_one(
+    membership = await db.activity_memberships.find_one_and_update(
+        {"id": membership["id"]},
+        {"$set": {"status": "waitlisted", "created_at": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER
+    )
+    activity = await db.activities.find_one_and_update(
         {"id": request.activity_id},
-        {"$push": {"participants": current_user.id}}
+        {"$inc": {"waitlist_count": 1}},
+        projection=JOIN_PROJECTION,
+        return_document=ReturnDocument.AFTER
     )
+    await feed_cache.invalidate(feed_scope(activity["city"]))
     
-    return {"message": "Successfully joined activity"}
+    return {
+        "message": "Activity is full, added to waitlist",
+        "status": "waitlisted",
+        "waitlist_position": await waitlist_position(request.activity_id, membership),
+        "participant_count": activity["participant_count"],
+        "max_participants": activity.get("max_participants")
+    }
+
+async def promote_from_waitlist(activity_id: str) -> Optional[str]:
+    """Move the first waitlisted user into a free spot; returns the promoted user id, if any"""
+    activity = await db.activities.find_one_and_update(
+        {"id": activity_id, "waitlist_count": {"$gt": 0}, **HAS_CAPACITY},
+        {"$inc": {"participant_count": 1, "waitlist_count": -1}}
+    )
+    if not activity:
+        return None
+    membership = await db.activity_memberships.find_one_and_update(
+        {"activity_id": activity_id, "status": "waitlisted"},
+        {"$set": {"status": "participant", "created_at": datetime.utcnow()}},
+        sort=[("created_at", ASCENDING)]
+    )
+    if not membership:
+        # The waitlist emptied concurrently (e.g. the user left it); undo the reservation
+        await db.activities.update_one({"id": activity_id}, {"$inc": {"participant_count": -1, "waitlist_count": 1}})
+        return None
+    return membership["user_id"]
 
-@api_router.get("/activities/my")
-async def get_my_activities(current_user: User = Depends(get_current_user)):
-    # Get activities created by user
-    created_activities = await db.activities.find({"creator_id": current_user.id}).to_list(100)
+@api_router.post("/activities/leave")
+async def leave_activity(request: LeaveActivityRequest, current_user: User = Depends(get_current_user)):
+    membership = await db.activity_memberships.find_one_and_delete({
+        "activity_id": request.activity_id,
+        "user_id": current_user.id,
+        "role": {"$ne": "creator"},
+        "status": {"$in": ["participant", "waitlisted"]}
+    })
+    if not membership:
+        activity = await db.activities.find_one({"id": request.activity_id}, {"_id": 0, "creator_id": 1})
+        if not activity:
+            raise HTTPException(status_code=404, detail="Activity not found")
+        if activity["creator_id"] == current_user.id:
+            raise HTTPException(status_code=400, detail="Creators cannot leave their own activity")
+        raise HTTPException(status_code=400, detail="Not a participant of this activity")
     
-    # Get activities user joined (excluding ones they created)
-    joined_activities = await db.activities.find({
-        "participants": current_user.id, 
-        "creator_id": {"$ne": current_user.id}
-    }).to_list(100)
+    counter = "participant_count" if membership["status"] == "participant" else "waitlist_count"
+    activity = await db.activities.find_one_and_update(
+        {"id": request.activity_id},
+        {"$inc": {counter: -1}},
+        projection=JOIN_PROJECTION
+    )
+    promoted_user_id = None
+    if membership["status"] == "participant":
+        promoted_user_id = await promote_from_waitlist(request.activity_id)
+    if activity:
+        await feed_cache.invalidate(feed_scope(activity["city"]))
     
-    return {
-        "created_activities": [Activity(**activity) for activity in created_activities],
-        "joined_activities": [Activity(**activity) for activity in joined_activities]
+    if promoted_user_id:
+        await message_hub.publish(promoted_user_id, {
+            "type": "waitlist_promoted",
+            "activity_id": request.activity_id
+        })
+    
+    return {"message": "Successfully left activity"}
+
+# Section -> (membership role, past?) for the "my activities" dashboard
+MY_ACTIVITY_SECTIONS = {
+    "created_upcoming": ("creator", False),
+    "created_past": ("creator", True),
+    "joined_upcoming": ("member", False),
+    "joined_past": ("member", True),
+}
+
+def my_activities_section_pipeline(role: str, past: bool, now: datetime, cursor: Optional[str], limit: int) -> list:
+    # Upcoming runs soonest first, past runs most recent first
+    match = {"role": role, "date": {"$lt": now} if past else {"$gte": now}}
+    keyset = keyset_filter(cursor, "date", descending=past, id_field="activity_id")
+    direction = DESCENDING if past else ASCENDING
+    return [
+        {"$match": {"$and": [match, keyset]} if keyset else match},
+        {"$sort": {"date": direction, "activity_id": direction}},
+        {"$limit": limit + 1},
+        {"$lookup": {
+            "from": "activities",
+            "localField": "activity_id",
+            "foreignField": "id",
+            "pipeline": [{"$project": activity_summary_rows.projection}],
+            "as": "activity"
+        }},
+        {"$unwind": "$activity"},
+        {"$project": {"_id": 0, "date": 1, "activity_id": 1, "activity": 1}}
+    ]
+
+@api_router.get("/activities/my", response_model=MyActivities)
+async def get_my_activities(
+    section: Optional[str] = Query(None, pattern=f"^({'|'.join(MY_ACTIVITY_SECTIONS)})$"),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Created and joined activities, each split into upcoming and past, in one round trip.
+
+    Without section, returns the first page of every section; pass section with a next_cursor
+    to page through that section alone.
+    """
+    if cursor and not section:
+        raise HTTPException(status_code=400, detail="cursor requires section")
+    now = datetime.utcnow()
+    sections = [section] if section else list(MY_ACTIVITY_SECTIONS)
+    
+    # The $match uses the (user_id, status, role, date) index; each facet then only
+    # sorts and pages this user's seats and looks up the activities for one page
+    facets = {
+        name: my_activities_section_pipeline(*MY_ACTIVITY_SECTIONS[name], now, cursor, limit)
+        for name in sections
     }
+    facets["counts"] = [{"$group": {
+        "_id": {"role": "$role", "past": {"$lt": ["$date", now]}},
+        "count": {"$sum": 1}
+    }}]
+    results = await db.activity_memberships.aggregate([
+        {"$match": {"user_id": current_user.id, "status": "participant"}},
+        {"$facet": facets}
+    ]).to_list(1)
+    result = results[0] if results else {}
+    counts = {(row["_id"]["role"], row["_id"]["past"]): row["count"] for row in result.get("counts", [])}
+    
+    response = {}
+    for name, (role, past) in MY_ACTIVITY_SECTIONS.items():
+        rows, next_cursor = paginate(result.get(name, []), limit, sort_field="date", id_field="activity_id")
+        response[name] = {
+            "activities": activity_summary_rows.rows([row["activity"] for row in rows]),
+            "total_count": counts.get((role, past), 0),
+            "next_cursor": next_cursor
+        }
+    return json_response(response)
+
+@api_router.get("/activities/{activity_id}", response_model=ActivityDetail)
+async def get_activity(activity_id: str, current_user: User = Depends(get_current_user)):
+    """Full activity for the detail view, with the caller's membership and social stats"""
+    activity, membership, stats = await asyncio.gather(
+        db.activities.find_one({"id": activity_id}, activity_rows.projection),
+        db.activity_memberships.find_one({"activity_id": activity_id, "user_id": current_user.id}, {"_id": 0, "status": 1}),
+        get_activity_social_stats([activity_id], current_user.id)
+    )
+    if not activity:
+        raise HTTPException(status_code=404, detail="Activity not found")
+    
+    detail = activity_rows.row(activity)
+    detail["membership_status"] = membership["status"] if membership else None
+    detail["is_participant"] = detail["membership_status"] == "participant"
+    detail["stats"] = stats[activity_id]
+    return json_response(detail)
+
+@api_router.get("/activities/{activity_id}/participants", response_model=MembershipPage)
+async def get_activity_participants(
+    activity_id: str,
+    status: str = Query("participant", pattern="^(participant|waitlisted|interested)$"),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """Members of an activity in the order they joined (for the waitlist, its queue order)"""
+    activity = await db.activities.find_one(
+        {"id": activity_id}, {"_id": 0, "participant_count": 1, "waitlist_count": 1}
+    )
+    if not activity:
+        raise HTTPException(status_code=404, detail="Activity not found")
+    query = with_keyset({"activity_id": activity_id, "status": status}, cursor, descending=False)
+    memberships_cursor = db.activity_memberships.find(
+        query, membership_rows.projection
+    ).sort(keyset_sort(descending=False)).limit(limit + 1)
+    memberships_data, next_cursor = paginate(await memberships_cursor.to_list(limit + 1), limit)
+    
+    return json_response({
+        "memberships": membership_rows.rows(memberships_data),
+        "participant_count": activity.get("participant_count", 0),
+        "waitlist_count": activity.get("waitlist_count", 0),
+        "next_cursor": next_cursor
+    })
 
 # Merchant and Discount Routes
+MERCHANT_OFFERS_LIMIT = 20
+
 @api_router.post("/merchants/discounts")
 async def create_discount_offer(
     discount_data: DiscountOfferCreate, 
@@ -488,7 +1869,6 @@ async def create_discount_offer(
     discount_doc = {
         "id": discount_id,
         "merchant_id": current_merchant.id,
-        "merchant_name": current_merchant.business_name,
         "title": discount_data.title,
         "description": discount_data.description,
         "discount_percentage": discount_data.discount_percentage,
@@ -498,7 +1878,8 @@ async def create_discount_offer(
         "max_redemptions": discount_data.max_redemptions,
         "current_redemptions": 0,
         "active": True,
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        **offer_merchant_fields(current_merchant.model_dump())
     }
     
     await db.discount_offers.insert_one(discount_doc)
@@ -508,101 +1889,360 @@ async def create_discount_offer(
         "discount": DiscountOffer(**discount_doc)
     }
 
-@api_router.get("/merchants/discounts/my")
-async def get_my_discount_offers(current_merchant: Merchant = Depends(get_current_merchant)):
-    discounts_cursor = db.discount_offers.find({"merchant_id": current_merchant.id})
-    discounts_data = await discounts_cursor.to_list(100)
+@api_router.get("/merchants/discounts/my", response_model=DiscountPage)
+async def get_my_discount_offers(
+    current_merchant: Merchant = Depends(get_current_merchant),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    query = with_keyset({"merchant_id": current_merchant.id}, cursor)
+    discounts_cursor = db.discount_offers.find(query, discount_rows.projection).sort(keyset_sort()).limit(limit + 1)
+    discounts_data, next_cursor = paginate(await discounts_cursor.to_list(limit + 1), limit)
     
-    return {
-        "discounts": [DiscountOffer(**discount) for discount in discounts_data],
-        "total_count": len(discounts_data)
-    }
+    return json_response({
+        "discounts": discount_rows.rows(discounts_data),
+        "total_count": len(discounts_data),
+        "next_cursor": next_cursor
+    })
 
-@api_router.get("/merchants/near-me")
+@api_router.get("/merchants/near-me", response_model=MerchantPage)
 async def get_merchants_near_me(
     current_user: User = Depends(get_current_user),
-    limit: int = 50,
-    business_type: Optional[str] = None
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    business_type: Optional[str] = None,
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: float = Query(25.0, gt=0, le=500)
 ):
-    """Get merchants and their active offers near the user"""
-    query = {"city": {"$regex": current_user.city, "$options": "i"}}
+    """Get merchants nearest-first around a point (default: the user's city) with their active offers"""
+    if (lat is None) != (lon is None):
+        raise HTTPException(status_code=400, detail="lat and lon must be provided together")
+    if lat is None:
+        lat, lon = gazetteer.lookup(current_user.city) or (None, None)
     
+    query = {}
     if business_type:
         query["business_type"] = {"$regex": business_type, "$options": "i"}
     
-    merchants_cursor = db.merchants.find(query)
-    merchants_data = await merchants_cursor.to_list(limit)
-    
-    # Get active discount offers for these merchants
-    merchant_ids = [merchant["id"] for merchant in merchants_data]
-    discounts_cursor = db.discount_offers.find({
-        "merchant_id": {"$in": merchant_ids},
-        "active": True,
-        "valid_until": {"$gte": datetime.utcnow()}
-    })
-    discounts_data = await discounts_cursor.to_list(1000)
+    if lat is not None:
+        # $geoNear walks the 2dsphere index nearest-first; pages are keyed on (distance_km, id)
+        sort_field = "distance_km"
+        geo_near = {
+            "near": geo_point(lat, lon),
+            "key": "geo",
+            "distanceField": "distance_km",
+            "distanceMultiplier": 0.001,
+            "maxDistance": radius_km * 1000,
+            "spherical": True,
+            "query": query
+        }
+        if cursor:
+            geo_near["minDistance"] = geo_min_distance(cursor)
+        pipeline = [
+            {"$geoNear": geo_near},
+            {"$match": keyset_filter(cursor, "distance_km", descending=False)},
+            {"$sort": {"distance_km": 1, "id": 1}}
+        ]
+    else:
+        # A city missing from the gazetteer falls back to matching merchants by city name, newest first
+        sort_field = "created_at"
+        query["city"] = {"$regex": current_user.city, "$options": "i"}
+        pipeline = [
+            {"$match": with_keyset(query, cursor)},
+            {"$sort": {"created_at": -1, "id": -1}}
+        ]
     
-    # Group discounts by merchant
-    merchant_discounts = {}
-    for discount in discounts_data:
-        merchant_id = discount["merchant_id"]
-        if merchant_id not in merchant_discounts:
-            merchant_discounts[merchant_id] = []
-        merchant_discounts[merchant_id].append(DiscountOffer(**discount))
+    # Offers come back in the same round trip, via discount_offers_merchant_id_created_at_id
+    pipeline += [
+        {"$limit": limit + 1},
+        {"$lookup": {
+            "from": "discount_offers",
+            "let": {"merchant_id": "$id"},
+            "pipeline": [
+                {"$match": {
+                    "$expr": {"$eq": ["$merchant_id", "$$merchant_id"]},
+                    "active": True,
+                    "valid_until": {"$gte": datetime.utcnow()}
+                }},
+                {"$sort": {"created_at": -1}},
+                {"$limit": MERCHANT_OFFERS_LIMIT},
+                {"$project": discount_rows.projection}
+            ],
+            "as": "active_offers"
+        }},
+        {"$project": {**merchant_rows.projection, "distance_km": 1, "active_offers": 1}}
+    ]
+    merchants_data, next_cursor = paginate(
+        await db.merchants.aggregate(pipeline).to_list(limit + 1), limit, sort_field
+    )
     
-    # Combine merchants with their offers
     merchants_with_offers = []
     for merchant_data in merchants_data:
-        merchant = Merchant(**merchant_data)
-        offers = merchant_discounts.get(merchant.id, [])
+        offers = discount_rows.rows(merchant_data.pop("active_offers"))
+        distance_km = merchant_data.pop("distance_km", None)
         merchants_with_offers.append({
-            "merchant": merchant,
+            "merchant": merchant_rows.row(merchant_data),
             "active_offers": offers,
-            "offers_count": len(offers)
+            "offers_count": len(offers),
+            "distance_km": round(distance_km, 2) if distance_km is not None else None
         })
     
-    return {
+    return json_response({
         "merchants": merchants_with_offers,
-        "total_count": len(merchants_with_offers)
-    }
+        "total_count": len(merchants_with_offers),
+        "center": {"lat": lat, "lon": lon} if lat is not None else None,
+        "radius_km": radius_km,
+        "next_cursor": next_cursor
+    })
 
-@api_router.get("/discounts/all")
+@api_router.get("/discounts/all", response_model=DiscountPage)
 async def get_all_discount_offers(
     current_user: User = Depends(get_current_user),
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     business_type: Optional[str] = None
 ):
-    """Get all active discount offers"""
-    # Build query for active offers
-    query = {
-        "active": True,
-        "valid_until": {"$gte": datetime.utcnow()}
-    }
-    
-    discounts_cursor = db.discount_offers.find(query).sort("created_at", -1)
-    discounts_data = await discounts_cursor.to_list(limit)
-    
-    # If business type filter is specified, filter by merchant business type
+    """Get all active discount offers, optionally of one business type"""
+    query = {"active": True}
     if business_type:
-        merchant_ids = [discount["merchant_id"] for discount in discounts_data]
-        matching_merchants = await db.merchants.find({
-            "id": {"$in": merchant_ids},
-            "business_type": {"$regex": business_type, "$options": "i"}
-        }).to_list(1000)
-        matching_merchant_ids = {merchant["id"] for merchant in matching_merchants}
-        discounts_data = [discount for discount in discounts_data 
-                         if discount["merchant_id"] in matching_merchant_ids]
+        # Equality on the denormalized business_type keeps this on one index, so every page is full
+        query["business_type"] = normalize_business_type(business_type)
+    query["valid_until"] = {"$gte": datetime.utcnow()}
+    
+    discounts_cursor = db.discount_offers.find(
+        with_keyset(query, cursor), discount_rows.projection
+    ).sort(keyset_sort()).limit(limit + 1)
+    discounts_data, next_cursor = paginate(await discounts_cursor.to_list(limit + 1), limit)
     
+    return json_response({
+        "discounts": discount_rows.rows(discounts_data),
+        "total_count": len(discounts_data),
+        "next_cursor": next_cursor
+    })
+
+# An offer can be redeemed when it has no cap (None or 0) or fewer redemptions than the cap
+HAS_REDEMPTIONS_LEFT = {"$or": [
+    {"max_redemptions": {"$in": [None, 0]}},
+    {"$expr": {"$lt": ["$current_redemptions", "$max_redemptions"]}}
+]}
+REDEEM_PROJECTION = {
+    "_id": 0, "id": 1, "merchant_id": 1, "active": 1, "valid_until": 1,
+    "minimum_buddies": 1, "max_redemptions": 1, "current_redemptions": 1
+}
+
+def redemption_response(redemption: dict, discount: dict, already_redeemed: bool) -> dict:
+    max_redemptions = discount.get("max_redemptions")
     return {
-        "discounts": [DiscountOffer(**discount) for discount in discounts_data],
-        "total_count": len(discounts_data)
+        "message": "Discount already redeemed by this group" if already_redeemed else "Discount redeemed successfully",
+        "already_redeemed": already_redeemed,
+        "redemption": DiscountRedemption(**redemption),
+        "current_redemptions": discount["current_redemptions"],
+        "remaining_redemptions": max(0, max_redemptions - discount["current_redemptions"]) if max_redemptions else None
     }
 
+@api_router.post("/discounts/redeem")
+async def redeem_discount(request: RedeemDiscountRequest, current_user: User = Depends(get_current_user)):
+    activity, membership = await asyncio.gather(
+        db.activities.find_one({"id": request.activity_id}, {"_id": 0, "id": 1, "participant_count": 1}),
+        db.activity_memberships.find_one(
+            {"activity_id": request.activity_id, "user_id": current_user.id, "status": "participant"}, {"_id": 0, "id": 1}
+        )
+    )
+    if not activity:
+        raise HTTPException(status_code=404, detail="Activity not found")
+    if not membership:
+        raise HTTPException(status_code=403, detail="Only participants can redeem for their group")
+    group_size = activity.get("participant_count", 0)
+    
+    discount = await db.discount_offers.find_one({"id": request.discount_id}, REDEEM_PROJECTION)
+    if not discount:
+        raise HTTPException(status_code=404, detail="Discount offer not found")
+    
+    # The unique (discount_id, activity_id) index claims the redemption for the group before a slot is
+    # taken, so a group's duplicate requests never hold slots that other groups are turned away for
+    redemption_doc = {
+        "id": str(uuid.uuid4()),
+        "discount_id": request.discount_id,
+        "merchant_id": discount["merchant_id"],
+        "activity_id": request.activity_id,
+        "redeemed_by": current_user.id,
+        "group_size": group_size,
+        "created_at": datetime.utcnow()
+    }
+    for attempt in range(2):
+        try:
+            await db.discount_redemptions.insert_one(redemption_doc)
+            break
+        except DuplicateKeyError:
+            existing = await db.discount_redemptions.find_one(
+                {"discount_id": request.discount_id, "activity_id": request.activity_id}, {"_id": 0}
+            )
+            if existing:
+                return redemption_response(existing, discount, already_redeemed=True)
+            # The group's other request withdrew its claim between our insert and lookup. Why it did
+            # (no slot, offer expired, ...) may no longer hold, so claim again once and let the
+            # conditional update below decide.
+            if attempt:
+                raise HTTPException(status_code=409, detail="Discount offer is being redeemed by your group, try again")
+    
+    # Validity, group size and the redemption cap are all checked in the filter, so a burst of
+    # concurrent redemptions can never push current_redemptions past max_redemptions
+    updated = await db.discount_offers.find_one_and_update(
+        {
+            "id": request.discount_id,
+            "active": True,
+            "valid_until": {"$gte": datetime.utcnow()},
+            "minimum_buddies": {"$lte": group_size},
+            **HAS_REDEMPTIONS_LEFT
+        },
+        {"$inc": {"current_redemptions": 1}},
+        projection=REDEEM_PROJECTION,
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated:
+        await db.discount_redemptions.delete_one({"id": redemption_doc["id"]})
+        # Slow path only: work out why the conditional update matched nothing
+        discount = await db.discount_offers.find_one({"id": request.discount_id}, REDEEM_PROJECTION)
+        if not discount:
+            raise HTTPException(status_code=404, detail="Discount offer not found")
+        if not discount["active"] or discount["valid_until"] < datetime.utcnow():
+            raise HTTPException(status_code=400, detail="Discount offer is no longer active")
+        if group_size < discount["minimum_buddies"]:
+            raise HTTPException(
+                status_code=400,
+                detail=f"This offer needs a group of at least {discount['minimum_buddies']}, yours has {group_size}"
+            )
+        raise HTTPException(status_code=409, detail="Discount offer has been fully redeemed")
+    
+    return redemption_response(redemption_doc, updated, already_redeemed=False)
+
+# Search
+# Activities and merchants are matched through their $text indexes, ranked by weighted text score. Every
+# document also stores its stemmed words in search_terms, an inverted index that serves queries when $text
+# can't be used (SEARCH_ENGINE=inverted, or a server that rejects $text, e.g. under the Stable API's strict
+# mode). The last word of a query is treated as a prefix and expanded through the typo-tolerant suggestions.
+SEARCH_ENGINE = os.environ.get("SEARCH_ENGINE", "auto")  # auto, text or inverted
+SEARCH_CANDIDATE_LIMIT = 2000  # inverted-index matches scored per query; caps the cost of very common words
+SEARCH_PREFIX_EXPANSIONS = 3
+EARTH_RADIUS_KM = 6378.1
+# IndexNotFound (no text index) and APIStrictError ($text outside the Stable API)
+TEXT_SEARCH_UNAVAILABLE_CODES = {27, 323}
+text_search_available = SEARCH_ENGINE != "inverted"
+
+async def run_search(collection, query: dict, words: List[str], projection: dict, tie_break: dict, limit: int) -> tuple:
+    """Top matches for words among documents matching query; returns (rows, engine used).
+
+    projection must keep the score field both engines compute.
+    """
+    global text_search_available
+    ranked = [{"$sort": {"score": -1, **tie_break}}, {"$limit": limit}, {"$project": projection}]
+    
+    if text_search_available:
+        pipeline = [
+            {"$match": {"$text": {"$search": " ".join(words)}, **query}},
+            {"$addFields": {"score": {"$meta": "textScore"}}},
+            *ranked
+        ]
+        try:
+            return await collection.aggregate(pipeline).to_list(limit), "text"
+        except OperationFailure as e:
+            if SEARCH_ENGINE == "text" or e.code not in TEXT_SEARCH_UNAVAILABLE_CODES:
+                raise
+            logger.warning(f"Text search unavailable, using the search_terms index instead: {e}")
+            text_search_available = False
+    
+    # Score by how many of the query's words a document contains
+    terms = sorted({stem(word) for word in words})
+    pipeline = [
+        {"$match": {"search_terms": {"$in": terms}, **query}},
+        {"$limit": SEARCH_CANDIDATE_LIMIT},
+        {"$addFields": {"score": {"$size": {"$setIntersection": ["$search_terms", terms]}}}},
+        *ranked
+    ]
+    return await collection.aggregate(pipeline).to_list(limit), "inverted"
+
+@api_router.get("/search", response_model=SearchResults)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    scope: str = Query("all", pattern="^(all|activities|merchants)$"),
+    city: Optional[str] = None,
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: float = Query(25.0, gt=0, le=500),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user)
+):
+    """Relevance-ranked activities and merchants for q, optionally near a point or in a city.
+
+    The date range applies to activities only.
+    """
+    if (lat is None) != (lon is None):
+        raise HTTPException(status_code=400, detail="lat and lon must be provided together")
+    words = tokenize(q)
+    if not words:
+        raise HTTPException(status_code=400, detail="Query has no searchable words")
+    
+    # A query still being typed ends mid-word: search its completions too
+    suggestions = []
+    if not q[-1].isspace():
+        suggestions = await suggest(db, words[-1], SEARCH_PREFIX_EXPANSIONS)
+        words = list(dict.fromkeys([*words, *(suggestion["term"] for suggestion in suggestions)]))
+    
+    location = {}
+    if lat is not None:
+        location["geo"] = {"$geoWithin": {"$centerSphere": [[lon, lat], radius_km / EARTH_RADIUS_KM]}}
+    elif city:
+        location["city"] = {"$regex": city, "$options": "i"}
+    activity_query = dict(location)
+    if date_from or date_to:
+        activity_query["date"] = {
+            **({"$gte": date_from} if date_from else {}),
+            **({"$lte": date_to} if date_to else {})
+        }
+    
+    async def no_results():
+        return [], None
+    
+    (activities, activity_engine), (merchants, merchant_engine) = await asyncio.gather(
+        run_search(
+            db.activities, activity_query, words, search_activity_rows.projection, {"date": 1, "id": 1}, limit
+        ) if scope in ("all", "activities") else no_results(),
+        run_search(
+            db.merchants, location, words, search_merchant_rows.projection, {"id": 1}, limit
+        ) if scope in ("all", "merchants") else no_results()
+    )
+    
+    return json_response({
+        "query": q,
+        "engine": activity_engine or merchant_engine,
+        "activities": search_activity_rows.rows(activities),
+        "merchants": search_merchant_rows.rows(merchants),
+        "suggestions": suggestions
+    })
+
+@api_router.get("/search/autocomplete", response_model=Autocomplete)
+async def autocomplete(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(8, ge=1, le=20),
+    current_user: User = Depends(get_current_user)
+):
+    """Completions for the last word of q, tolerating one typo once it is four letters or longer"""
+    words = tokenize(q)
+    suggestions = await suggest(db, words[-1], limit) if words else []
+    return json_response({"query": q, "suggestions": suggestions})
+
 # Social Features - Comments and Likes
 @api_router.post("/activities/{activity_id}/comment")
 async def add_comment(activity_id: str, comment_data: CommentCreate, current_user: User = Depends(get_current_user)):
-    # Verify activity exists
-    activity = await db.activities.find_one({"id": activity_id})
+    # Bump the counter first; it doubles as the existence check
+    activity = await db.activities.find_one_and_update(
+        {"id": activity_id},
+        {"$inc": {"comment_count": 1}},
+        projection={"_id": 0, "comment_count": 1}
+    )
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
     
@@ -616,43 +2256,49 @@ async def add_comment(activity_id: str, comment_data: CommentCreate, current_use
         "created_at": datetime.utcnow()
     }
     
-    await db.activity_comments.insert_one(comment_doc)
+    try:
+        await db.activity_comments.insert_one(comment_doc)
+    except Exception:
+        await db.activities.update_one({"id": activity_id}, {"$inc": {"comment_count": -1}})
+        raise
     
     return {
         "message": "Comment added successfully",
         "comment": ActivityComment(**comment_doc)
     }
 
-@api_router.get("/activities/{activity_id}/comments")
-async def get_activity_comments(activity_id: str):
-    comments_cursor = db.activity_comments.find({"activity_id": activity_id}).sort("created_at", 1)
-    comments_data = await comments_cursor.to_list(1000)
+@api_router.get("/activities/{activity_id}/comments", response_model=CommentPage)
+async def get_activity_comments(
+    activity_id: str,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    # Oldest first, so a thread reads top to bottom across pages
+    query = with_keyset({"activity_id": activity_id}, cursor, descending=False)
+    comments_cursor = db.activity_comments.find(
+        query, comment_rows.projection
+    ).sort(keyset_sort(descending=False)).limit(limit + 1)
+    comments_data, next_cursor = paginate(await comments_cursor.to_list(limit + 1), limit)
     
-    return {
-        "comments": [ActivityComment(**comment) for comment in comments_data],
-        "total_count": len(comments_data)
-    }
+    return json_response({
+        "comments": comment_rows.rows(comments_data),
+        "total_count": len(comments_data),
+        "next_cursor": next_cursor
+    })
 
 @api_router.post("/activities/{activity_id}/like")
 async def toggle_like(activity_id: str, current_user: User = Depends(get_current_user)):
-    # Verify activity exists
-    activity = await db.activities.find_one({"id": activity_id})
-    if not activity:
-        raise HTTPException(status_code=404, detail="Activity not found")
-    
-    # Check if user already liked this activity
-    existing_like = await db.activity_likes.find_one({
+    # Unlike if a like exists; the unique (activity_id, user_id) index keeps this a single indexed delete
+    deleted = await db.activity_likes.delete_one({
         "activity_id": activity_id,
         "user_id": current_user.id
     })
     
-    if existing_like:
-        # Unlike - remove the like
-        await db.activity_likes.delete_one({"id": existing_like["id"]})
+    if deleted.deleted_count:
         message = "Activity unliked"
         liked = False
+        delta = -1
     else:
-        # Like - add a like
         like_id = str(uuid.uuid4())
         like_doc = {
             "id": like_id,
@@ -660,29 +2306,64 @@ async def toggle_like(activity_id: str, current_user: User = Depends(get_current
             "user_id": current_user.id,
             "created_at": datetime.utcnow()
         }
-        await db.activity_likes.insert_one(like_doc)
+        try:
+            await db.activity_likes.insert_one(like_doc)
+        except DuplicateKeyError:
+            # A concurrent request liked it first and has already counted it
+            activity = await db.activities.find_one({"id": activity_id}, {"_id": 0, "like_count": 1})
+            if not activity:
+                raise HTTPException(status_code=404, detail="Activity not found")
+            return {"message": "Activity liked", "liked": True, "like_count": activity.get("like_count", 0)}
         message = "Activity liked"
         liked = True
+        delta = 1
     
-    # Get updated like count
-    like_count = await db.activity_likes.count_documents({"activity_id": activity_id})
+    # Keep the denormalized counter in step; constant time however many likes the activity has
+    activity = await db.activities.find_one_and_update(
+        {"id": activity_id},
+        {"$inc": {"like_count": delta}},
+        projection={"_id": 0, "like_count": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if not activity:
+        if liked:
+            await db.activity_likes.delete_one({"id": like_id})
+        raise HTTPException(status_code=404, detail="Activity not found")
     
     return {
         "message": message,
         "liked": liked,
-        "like_count": like_count
+        "like_count": activity["like_count"]
     }
 
-@api_router.get("/activities/{activity_id}/likes")
-async def get_activity_likes(activity_id: str):
-    like_count = await db.activity_likes.count_documents({"activity_id": activity_id})
-    likes_cursor = db.activity_likes.find({"activity_id": activity_id}).sort("created_at", -1)
-    likes_data = await likes_cursor.to_list(1000)
+@api_router.post("/activities/stats")
+async def get_activities_stats(request: ActivityStatsRequest, current_user: User = Depends(get_current_user)):
+    """Like counts, whether the caller liked each activity, and comment counts in one call"""
+    activity_ids = list(dict.fromkeys(request.activity_ids))
+    stats = await get_activity_social_stats(activity_ids, current_user.id)
     
-    return {
-        "likes": [ActivityLike(**like) for like in likes_data],
-        "like_count": like_count
-    }
+    return {"stats": stats}
+
+@api_router.get("/activities/{activity_id}/likes", response_model=LikePage)
+async def get_activity_likes(
+    activity_id: str,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    activity = await db.activities.find_one({"id": activity_id}, {"_id": 0, "like_count": 1})
+    like_count = activity.get("like_count", 0) if activity else 0
+    likes_cursor = db.activity_likes.find(
+        with_keyset({"activity_id": activity_id}, cursor), like_rows.projection
+    ).sort(keyset_sort()).limit(limit + 1)
+    likes_data, next_cursor = paginate(await likes_cursor.to_list(limit + 1), limit)
+    
+    return json_response({
+        "likes": like_rows.rows(likes_data),
+        "like_count": like_count,
+        "next_cursor": next_cursor
+    })
+
+
 @api_router.post("/messages")
 async def send_message(message_data: MessageCreate, current_user: User = Depends(get_current_user)):
     message_id = str(uuid.uuid4())
@@ -697,41 +2378,129 @@ async def send_message(message_data: MessageCreate, current_user: User = Depends
     }
     
     await db.messages.insert_one(message_doc)
+    message = Message(**message_doc)
+    
+    await message_hub.publish(message.recipient_id, {"type": "message", "message": message.model_dump(mode="json")})
     
     return {
         "message": "Message sent successfully",
-        "message_data": Message(**message_doc)
+        "message_data": message
     }
 
-@api_router.get("/messages/conversations")
-async def get_conversations(current_user: User = Depends(get_current_user)):
-    # Get all messages involving the current user
-    messages_cursor = db.messages.find({
-        "$or": [
-            {"sender_id": current_user.id},
-            {"recipient_id": current_user.id}
-        ]
-    }).sort("created_at", -1)
+@api_router.post("/messages/with/{partner_id}/read")
+async def mark_conversation_read(partner_id: str, current_user: User = Depends(get_current_user)):
+    """Mark everything the partner sent to the caller as read and push a read receipt to the partner"""
+    read_at = datetime.utcnow()
+    result = await db.messages.update_many(
+        {"sender_id": partner_id, "recipient_id": current_user.id, "read": False},
+        {"$set": {"read": True, "read_at": read_at}}
+    )
     
-    messages = await messages_cursor.to_list(1000)
+    if result.modified_count:
+        await message_hub.publish(partner_id, {
+            "type": "read",
+            "reader_id": current_user.id,
+            "read_at": read_at.isoformat(),
+            "count": result.modified_count
+        })
     
-    # Group by conversation partner
-    conversations = {}
-    for message in messages:
-        partner_id = message["recipient_id"] if message["sender_id"] == current_user.id else message["sender_id"]
-        
-        if partner_id not in conversations:
-            # Get partner info
-            partner_data = await db.users.find_one({"id": partner_id})
-            conversations[partner_id] = {
-                "partner": User(**partner_data) if partner_data else None,
-                "last_message": Message(**message),
-                "messages": []
+    return {"message": "Conversation marked as read", "read_count": result.modified_count}
+
+@api_router.get("/messages/conversations", response_model=ConversationPage)
+async def get_conversations(
+    current_user: User = Depends(get_current_user),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """One row per conversation partner with the last message and unread count, newest first"""
+    user_id = current_user.id
+    pipeline = [
+        {"$match": {"$or": [{"sender_id": user_id}, {"recipient_id": user_id}]}},
+        {"$sort": {"created_at": -1, "id": -1}},
+        {"$group": {
+            "_id": {"$cond": [{"$eq": ["$sender_id", user_id]}, "$recipient_id", "$sender_id"]},
+            "last_message": {"$first": "$$ROOT"},
+            "unread_count": {"$sum": {"$cond": [
+                {"$and": [{"$eq": ["$recipient_id", user_id]}, {"$eq": ["$read", False]}]}, 1, 0
+            ]}}
+        }},
+        {"$match": keyset_filter(cursor, "last_message.created_at", id_field="last_message.id")},
+        {"$sort": {"last_message.created_at": -1, "last_message.id": -1}},
+        {"$limit": limit + 1},
+        # Partner profiles for the whole page in one indexed join instead of a find_one per partner
+        {"$lookup": {"from": "users", "localField": "_id", "foreignField": "id", "as": "partner"}},
+        {"$project": {
+            "_id": 0,
+            "last_message": 1,
+            "unread_count": 1,
+            "partner": {"$arrayElemAt": ["$partner", 0]}
+        }},
+        {"$project": {
+            "unread_count": 1,
+            **{f"last_message.{field}": 1 for field in Message.model_fields},
+            **{f"partner.{field}": 1 for field in User.model_fields}
+        }}
+    ]
+    rows = await db.messages.aggregate(pipeline).to_list(limit + 1)
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_message = rows[-1]["last_message"]
+        next_cursor = encode_cursor("last_message.created_at", last_message["created_at"], last_message["id"])
+    
+    return json_response({
+        "conversations": [
+            {
+                "partner": user_rows.row(row["partner"]) if row.get("partner") else None,
+                "last_message": message_rows.row(row["last_message"]),
+                "unread_count": row.get("unread_count", 0)
             }
-        
-        conversations[partner_id]["messages"].append(Message(**message))
+            for row in rows
+        ],
+        "next_cursor": next_cursor
+    })
+
+@api_router.get("/messages/with/{partner_id}", response_model=MessagePage)
+async def get_conversation_history(
+    partner_id: str,
+    current_user: User = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """Messages exchanged with one partner, newest first"""
+    query = {"$or": [
+        {"sender_id": current_user.id, "recipient_id": partner_id},
+        {"sender_id": partner_id, "recipient_id": current_user.id}
+    ]}
+    messages_cursor = db.messages.find(
+        with_keyset(query, cursor), message_rows.projection
+    ).sort(keyset_sort()).limit(limit + 1)
+    messages_data, next_cursor = paginate(await messages_cursor.to_list(limit + 1), limit)
+    
+    return json_response({
+        "messages": message_rows.rows(messages_data),
+        "next_cursor": next_cursor
+    })
+
+# Real-time Delivery
+message_hub = MessageHub()
+
+@api_router.websocket("/ws")
+async def realtime_socket(websocket: WebSocket, token: str = ""):
+    """Push new messages and read receipts to the user; browsers pass the JWT as ?token="""
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except jwt.PyJWTError:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    user_id = payload.get("user_id")
+    if not user_id or payload.get("user_type", "user") != "user":
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
     
-    return {"conversations": list(conversations.values())}
+    await websocket.accept()
+    await message_hub.serve(user_id, websocket)
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -750,7 +2519,3 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
@@ -0,0 +1,185 @@
+"""
+Background sweeper that keeps the hot collections down to live offers and recent activities
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import List
+
+from pymongo import ASCENDING, ReplaceOne
+
+from cache import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Hot collection -> archive collection for an activity and everything hanging off it
+ACTIVITY_ARCHIVES = {
+    "activities": "activities_archive",
+    "activity_likes": "activity_likes_archive",
+    "activity_comments": "activity_comments_archive",
+    "activity_memberships": "activity_memberships_archive",
+}
+CHILD_COLLECTIONS = ("activity_likes", "activity_comments", "activity_memberships")
+
+async def deactivate_expired_offers(database, now: datetime, batch_size: int = 500) -> int:
+    """Flip active off on one batch of offers past valid_until; returns how many were deactivated"""
+    expired = await database.discount_offers.find(
+        {"active": True, "valid_until": {"$lt": now}}, {"_id": 0, "id": 1}
+    ).limit(batch_size).to_list(batch_size)
+    if not expired:
+        return 0
+    result = await database.discount_offers.update_many(
+        {"id": {"$in": [offer["id"] for offer in expired]}, "active": True},
+        {"$set": {"active": False, "deactivated_at": now}}
+    )
+    return result.modified_count
+
+async def _copy_to_archive(database, collection_name: str, query: dict, archived_at: datetime, batch_size: int):
+    # Upserts keyed on _id make the copy safe to repeat if a previous sweep died half way
+    archive = database[ACTIVITY_ARCHIVES[collection_name]]
+    batch = []
+    async for doc in database[collection_name].find(query):
+        doc["archived_at"] = archived_at
+        batch.append(ReplaceOne({"_id": doc["_id"]}, doc, upsert=True))
+        if len(batch) >= batch_size:
+            await archive.bulk_write(batch, ordered=False)
+            batch = []
+    if batch:
+        await archive.bulk_write(batch, ordered=False)
+
+async def archive_past_activities(database, cutoff: datetime, batch_size: int = 500) -> int:
+    """Move one batch of activities dated before cutoff, with their likes, comments and memberships, into the archives.
+
+    Copies happen before deletes and the activity itself is deleted last, so an interrupted sweep
+    leaves the activity in place to be picked up again by the next one.
+    """
+    past = await database.activities.find(
+        {"date": {"$lt": cutoff}}, {"_id": 0, "id": 1}
+    ).sort("date", ASCENDING).limit(batch_size).to_list(batch_size)
+    if not past:
+        return 0
+    activity_ids: List[str] = [activity["id"] for activity in past]
+    archived_at = datetime.utcnow()
+
+    for collection_name in CHILD_COLLECTIONS:
+        await _copy_to_archive(database, collection_name, {"activity_id": {"$in": activity_ids}}, archived_at, batch_size)
+    await _copy_to_archive(database, "activities", {"id": {"$in": activity_ids}}, archived_at, batch_size)
+
+    for collection_name in CHILD_COLLECTIONS:
+        await database[collection_name].delete_many({"activity_id": {"$in": activity_ids}})
+    result = await database.activities.delete_many({"id": {"$in": activity_ids}})
+    return result.deleted_count
+
+class ExpirySweeper:
+    """Periodically deactivates expired offers and archives past activities in bounded batches.
+
+    Each run processes at most max_batches batches per task and yields to the event loop between
+    them, so a large backlog is worked off over several runs instead of stalling request handling.
+    With Redis configured, only one worker sweeps per interval.
+    """
+
+    LOCK_KEY = "findbuddy:sweeper:lock"
+
+    def __init__(
+        self,
+        database,
+        interval: float = 300.0,
+        batch_size: int = 500,
+        max_batches: int = 20,
+        archive_after: timedelta = timedelta(days=30)
+    ):
+        self.database = database
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.archive_after = archive_after
+        self._task = None
+        self.runs = 0
+        self.skipped_runs = 0
+        self.offers_deactivated = 0
+        self.activities_archived = 0
+        self.errors = 0
+        self.last_run_at = None
+        self.last_run_ms = None
+
+    async def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                if await self._acquire_run_lock():
+                    await self.sweep()
+                else:
+                    self.skipped_runs += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Expiry sweep failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def _acquire_run_lock(self) -> bool:
+        redis = get_redis()
+        if redis is None:
+            return True
+        try:
+            return bool(await redis.set(self.LOCK_KEY, b"1", nx=True, ex=max(1, int(self.interval))))
+        except Exception as e:
+            logger.warning(f"Redis sweeper lock failed, sweeping anyway: {e}")
+            return True
+
+    async def sweep(self) -> dict:
+        """Run every task until it has nothing left or hits max_batches; returns counts for this run"""
+        started = datetime.utcnow()
+        counts = {"offers_deactivated": 0, "activities_archived": 0}
+
+        for _ in range(self.max_batches):
+            deactivated = await deactivate_expired_offers(self.database, started, self.batch_size)
+            counts["offers_deactivated"] += deactivated
+            await asyncio.sleep(0)
+            if deactivated < self.batch_size:
+                break
+
+        for _ in range(self.max_batches):
+            archived = await archive_past_activities(self.database, started - self.archive_after, self.batch_size)
+            counts["activities_archived"] += archived
+            await asyncio.sleep(0)
+            if archived < self.batch_size:
+                break
+
+        self.runs += 1
+        self.offers_deactivated += counts["offers_deactivated"]
+        self.activities_archived += counts["activities_archived"]
+        self.last_run_at = started
+        self.last_run_ms = round((datetime.utcnow() - started).total_seconds() * 1000, 1)
+        if counts["offers_deactivated"] or counts["activities_archived"]:
+            logger.info(
+                f"Expiry sweep: {counts['offers_deactivated']} offers deactivated, "
+                f"{counts['activities_archived']} activities archived"
+            )
+        return counts
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "interval_seconds": self.interval,
+            "batch_size": self.batch_size,
+            "runs": self.runs,
+            "skipped_runs": self.skipped_runs,
+            "offers_deactivated": self.offers_deactivated,
+            "activities_archived": self.activities_archived,
+            "errors": self.errors,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_run_ms": self.last_run_ms
+        }
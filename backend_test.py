@@ -4,6 +4,7 @@ import sys
 import random
 import string
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 class FindBuddyAPITester:
@@ -291,6 +292,69 @@ class FindBuddyAPITester:
         )
         return success
 
+    def test_concurrent_join_capacity(self, joiners=20, max_participants=5):
+        """Stress test: concurrent joins must never push an activity past max_participants"""
+        self.tests_run += 1
+        name = "Concurrent Join Capacity"
+        print(f"\n🔍 Testing {name}...")
+        headers = {'Content-Type': 'application/json'}
+        city = f"Stress City {self.generate_random_string()}"
+        
+        # Register the joiners up front so only the joins race
+        tokens = []
+        for _ in range(joiners):
+            suffix = self.generate_random_string()
+            response = requests.post(f"{self.base_url}/auth/register", json={
+                "name": f"Stress User {suffix}",
+                "email": f"stress.user.{suffix}@example.com",
+                "password": "TestPassword123!",
+                "city": city,
+                "phone": "1234567890"
+            }, headers=headers)
+            if response.status_code == 200:
+                tokens.append(response.json()['token'])
+        
+        creator_headers = {**headers, 'Authorization': f'Bearer {tokens[0]}'} if tokens else headers
+        response = requests.post(f"{self.base_url}/activities", json={
+            "title": "Capacity Stress Test",
+            "description": "Concurrent join stress test",
+            "date": (datetime.now() + timedelta(days=1)).isoformat(),
+            "location": "Stress Hall",
+            "city": city,
+            "max_participants": max_participants,
+            "category": "Testing"
+        }, headers=creator_headers)
+        if response.status_code != 200:
+            print(f"❌ Failed - Could not create activity: {response.status_code}")
+            self.test_results.append({"name": name, "status": "FAILED", "details": "Could not create activity"})
+            return False
+        activity_id = response.json()['activity']['id']
+        
+        def join(token):
+            return requests.post(
+                f"{self.base_url}/activities/join",
+                json={"activity_id": activity_id},
+                headers={**headers, 'Authorization': f'Bearer {token}'}
+            ).status_code
+        
+        with ThreadPoolExecutor(max_workers=len(tokens)) as pool:
+            statuses = list(pool.map(join, tokens[1:]))
+        
+        response = requests.get(f"{self.base_url}/activities/{activity_id}", headers=creator_headers)
+        participants = response.json()['participant_count'] if response.status_code == 200 else -1
+        joined = statuses.count(200)
+        
+        # The creator holds one seat, so exactly max_participants - 1 joins may succeed
+        success = participants == max_participants and joined == max_participants - 1
+        details = f"{joined}/{len(statuses)} joins succeeded, {participants}/{max_participants} participants"
+        if success:
+            self.tests_passed += 1
+            print(f"✅ Passed - {details}")
+        else:
+            print(f"❌ Failed - {details}")
+        self.test_results.append({"name": name, "status": "PASSED" if success else "FAILED", "details": details})
+        return success
+
     def test_get_my_activities(self):
         """Test getting user's activities"""
         success, response = self.run_test(
@@ -301,9 +365,9 @@ class FindBuddyAPITester:
         )
         
         if success:
-            created = response.get('created_activities', [])
-            joined = response.get('joined_activities', [])
-            print(f"✅ User has {len(created)} created and {len(joined)} joined activities")
+            created = response['created_upcoming']['total_count'] + response['created_past']['total_count']
+            joined = response['joined_upcoming']['total_count'] + response['joined_past']['total_count']
+            print(f"✅ User has {created} created and {joined} joined activities")
         return success
 
     def test_create_discount_offer(self):
@@ -329,6 +393,98 @@ class FindBuddyAPITester:
         )
         return success
 
+    def test_concurrent_redemption_burst(self, groups=15, max_redemptions=5, requests_per_group=3):
+        """Load test: a burst of group redemptions must stop exactly at max_redemptions, once per group"""
+        self.tests_run += 1
+        name = "Concurrent Redemption Burst"
+        print(f"\n🔍 Testing {name}...")
+        headers = {'Content-Type': 'application/json'}
+        city = f"Promo City {self.generate_random_string()}"
+        
+        response = requests.post(f"{self.base_url}/merchants/discounts", json={
+            "title": "Redemption Burst Promo",
+            "description": "Concurrent redemption load test",
+            "discount_percentage": 10,
+            "minimum_buddies": 2,
+            "valid_until": (datetime.now() + timedelta(days=1)).isoformat(),
+            "terms_conditions": "Load test only",
+            "max_redemptions": max_redemptions
+        }, headers={**headers, 'Authorization': f'Bearer {self.merchant_token}'})
+        if response.status_code != 200:
+            print(f"❌ Failed - Could not create discount offer: {response.status_code}")
+            self.test_results.append({"name": name, "status": "FAILED", "details": "Could not create discount offer"})
+            return False
+        discount_id = response.json()['discount']['id']
+        
+        # Each buddy group is an activity with a creator and one joiner; set them all up before the burst
+        def register():
+            suffix = self.generate_random_string()
+            return requests.post(f"{self.base_url}/auth/register", json={
+                "name": f"Promo User {suffix}",
+                "email": f"promo.user.{suffix}@example.com",
+                "password": "TestPassword123!",
+                "city": city,
+                "phone": "1234567890"
+            }, headers=headers).json()['token']
+        
+        attempts = []
+        for _ in range(groups):
+            creator, buddy = register(), register()
+            activity_id = requests.post(f"{self.base_url}/activities", json={
+                "title": "Promo Group",
+                "description": "Redemption load test group",
+                "date": (datetime.now() + timedelta(days=1)).isoformat(),
+                "location": "Promo Hall",
+                "city": city,
+                "category": "Testing"
+            }, headers={**headers, 'Authorization': f'Bearer {creator}'}).json()['activity']['id']
+            requests.post(
+                f"{self.base_url}/activities/join",
+                json={"activity_id": activity_id},
+                headers={**headers, 'Authorization': f'Bearer {buddy}'}
+            )
+            # Both members (and a retry) redeem for the same group at once
+            attempts += [(activity_id, token) for token in [creator, buddy, creator][:requests_per_group]]
+        
+        def redeem(attempt):
+            activity_id, token = attempt
+            response = requests.post(
+                f"{self.base_url}/discounts/redeem",
+                json={"discount_id": discount_id, "activity_id": activity_id},
+                headers={**headers, 'Authorization': f'Bearer {token}'}
+            )
+            body = response.json() if response.status_code == 200 else {}
+            return activity_id, response.status_code, body.get('already_redeemed')
+        
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=len(attempts)) as pool:
+            results = list(pool.map(redeem, attempts))
+        elapsed = time.time() - started
+        
+        redeemed_groups = {activity_id for activity_id, status, already in results if status == 200 and not already}
+        fresh_redemptions = sum(1 for _, status, already in results if status == 200 and not already)
+        sold_out = sum(1 for _, status, _ in results if status == 409)
+        response = requests.get(
+            f"{self.base_url}/merchants/discounts/my",
+            headers={**headers, 'Authorization': f'Bearer {self.merchant_token}'}
+        )
+        discount = next((d for d in response.json().get('discounts', []) if d['id'] == discount_id), {})
+        current = discount.get('current_redemptions', -1)
+        
+        # Exactly max_redemptions groups win, each at most once, and the counter agrees
+        success = fresh_redemptions == len(redeemed_groups) == max_redemptions and current == max_redemptions
+        details = (
+            f"{len(results)} requests in {elapsed:.2f}s: {fresh_redemptions} redemptions, "
+            f"{sold_out} sold out, counter {current}/{max_redemptions}"
+        )
+        if success:
+            self.tests_passed += 1
+            print(f"✅ Passed - {details}")
+        else:
+            print(f"❌ Failed - {details}")
+        self.test_results.append({"name": name, "status": "PASSED" if success else "FAILED", "details": details})
+        return success
+
     def test_get_merchants_near_me(self):
         """Test getting merchants near me"""
         success, response = self.run_test(
@@ -403,10 +559,12 @@ class FindBuddyAPITester:
         self.test_get_activities_around_me()
         self.test_activities_with_city_filter()  # Test city filter
         self.test_join_activity()
+        self.test_concurrent_join_capacity()
         self.test_get_my_activities()
         
         # Merchant and discount tests
         self.test_create_discount_offer()
+        self.test_concurrent_redemption_burst()
         self.test_get_merchants_near_me()
         self.test_get_all_discount_offers()
         
@@ -4,25 +4,58 @@ set -e
 # Start the FastAPI backend
 cd /backend || { echo "Backend directory not found"; exit 1; }
 
-echo "Starting FastAPI backend"
-# Start Uvicorn with proper host binding
-uvicorn server:app --host 0.0.0.0 --port 8001 &
-BACKEND_PID=$!
-
-echo "Waiting for backend to start..."
-sleep 30
+# One worker process per core unless WEB_CONCURRENCY says otherwise
+WEB_CONCURRENCY="${WEB_CONCURRENCY:-$(nproc)}"
+export WEB_CONCURRENCY
 
-if ! kill -0 $BACKEND_PID 2>/dev/null; then
-    echo "Backend failed to start at initialization, exiting"
-    exit 1
+# Several workers must share caches and pub/sub; without a Redis, run a local in-memory one
+REDIS_PID=""
+if [ "$WEB_CONCURRENCY" -gt 1 ] && [ -z "$REDIS_URL" ]; then
+    if command -v redis-server >/dev/null 2>&1; then
+        echo "Starting local Redis for shared worker state"
+        redis-server --bind 127.0.0.1 --port 6379 --save "" --appendonly no --daemonize no &
+        REDIS_PID=$!
+        export REDIS_URL="redis://127.0.0.1:6379/0"
+        until redis-cli -h 127.0.0.1 -p 6379 ping >/dev/null 2>&1; do
+            sleep 0.1
+        done
+    else
+        echo "WARNING: $WEB_CONCURRENCY workers without REDIS_URL or redis-server; state is not shared"
+    fi
 fi
 
+echo "Starting FastAPI backend with $WEB_CONCURRENCY worker(s)"
+# Gunicorn supervises the Uvicorn workers; SIGHUP reloads them gracefully
+gunicorn -c gunicorn.conf.py server:app &
+BACKEND_PID=$!
+
+# Poll readiness (MongoDB reachable, pool warm, indexes ensured) instead of sleeping a fixed time
+READY_URL="http://127.0.0.1:8001/api/health/ready"
+READY_TIMEOUT="${READY_TIMEOUT:-90}"
+echo "Waiting for backend to become ready..."
+elapsed=0
+until wget -q -O /dev/null "$READY_URL" 2>/dev/null; do
+    if ! kill -0 $BACKEND_PID 2>/dev/null; then
+        echo "Backend failed to start at initialization, exiting"
+        exit 1
+    fi
+    if [ "$elapsed" -ge "$READY_TIMEOUT" ]; then
+        echo "Backend not ready after ${READY_TIMEOUT}s, exiting"
+        kill $BACKEND_PID
+        exit 1
+    fi
+    sleep 1
+    elapsed=$((elapsed + 1))
+done
+echo "Backend ready after ${elapsed}s"
+
 # Start Nginx
 nginx -g 'daemon off;' &
 NGINX_PID=$!
 
-# Handle termination signals
-trap 'kill $BACKEND_PID $NGINX_PID; exit 0' SIGTERM SIGINT
+# Handle termination signals; HUP reloads backend workers and nginx without dropping requests
+trap 'kill $BACKEND_PID $NGINX_PID $REDIS_PID; exit 0' TERM INT
+trap 'kill -HUP $BACKEND_PID $NGINX_PID' HUP
 
 # Check if processes are still running
 while kill -0 $BACKEND_PID 2>/dev/null && kill -0 $NGINX_PID 2>/dev/null; do
@@ -32,10 +65,10 @@ done
 # If we get here, one of the processes died
 if kill -0 $BACKEND_PID 2>/dev/null; then
     echo "Nginx died, shutting down backend..."
-    kill $BACKEND_PID
+    kill $BACKEND_PID $REDIS_PID
 else
     echo "Backend died, shutting down nginx..."
-    kill $NGINX_PID
+    kill $NGINX_PID $REDIS_PID
 fi
 
 exit 1
@@ -4,6 +4,8 @@ import './App.css';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
+// Matches DESCRIPTION_PREVIEW_LENGTH in backend/server.py
+const DESCRIPTION_PREVIEW_LENGTH = 280;
 
 // Auth Context
 const AuthContext = React.createContext();
@@ -153,7 +155,7 @@ const Header = () => {
 };
 
 const UserProfileSidebar = ({ user, onCreateActivity }) => {
-  const [myActivities, setMyActivities] = useState({ created: [], joined: [] });
+  const [myActivities, setMyActivities] = useState({ created: [], joined: [], createdCount: 0, joinedCount: 0 });
   const [loadingActivities, setLoadingActivities] = useState(false);
 
   useEffect(() => {
@@ -164,9 +166,12 @@ const UserProfileSidebar = ({ user, onCreateActivity }) => {
     setLoadingActivities(true);
     try {
       const response = await axios.get(`${API}/activities/my`);
+      const { created_upcoming, created_past, joined_upcoming, joined_past } = response.data;
       setMyActivities({
-        created: response.data.created_activities,
-        joined: response.data.joined_activities
+        created: created_upcoming.activities,
+        joined: joined_upcoming.activities,
+        createdCount: created_upcoming.total_count + created_past.total_count,
+        joinedCount: joined_upcoming.total_count + joined_past.total_count
       });
     } catch (error) {
       console.error('Error fetching my activities:', error);
@@ -234,11 +239,11 @@ const UserProfileSidebar = ({ user, onCreateActivity }) => {
               </div>
               <div className="flex justify-between">
                 <span>Activities Created:</span>
-                <span className="font-medium text-orange-600">{myActivities.created.length}</span>
+                <span className="font-medium text-orange-600">{myActivities.createdCount}</span>
               </div>
               <div className="flex justify-between">
                 <span>Activities Joined:</span>
-                <span className="font-medium text-green-600">{myActivities.joined.length}</span>
+                <span className="font-medium text-green-600">{myActivities.joinedCount}</span>
               </div>
             </div>
           </div>
@@ -262,10 +267,10 @@ const UserProfileSidebar = ({ user, onCreateActivity }) => {
             <div>
               <h4 className="text-sm font-semibold text-gray-700 mb-2 flex items-center">
                 <span className="mr-1">🎯</span>
-                Organizing ({myActivities.created.length})
+                Organizing ({myActivities.createdCount})
               </h4>
               {myActivities.created.length === 0 ? (
-                <p className="text-xs text-gray-500">No activities created yet</p>
+                <p className="text-xs text-gray-500">No upcoming activities</p>
               ) : (
                 <div className="space-y-2">
                   {myActivities.created.slice(0, 3).map((activity) => (
@@ -275,12 +280,12 @@ const UserProfileSidebar = ({ user, onCreateActivity }) => {
                       </h5>
                       <p className="text-xs text-orange-600 mt-1 flex items-center">
                         <span className="mr-1">📅</span>
-                        {new Date(activity.date).toLocaleDateString()} • {activity.participants.length} buddies
+                        {new Date(activity.date).toLocaleDateString()} • {activity.participant_count} buddies
                       </p>
                     </div>
                   ))}
-                  {myActivities.created.length > 3 && (
-                    <p className="text-xs text-gray-500">+{myActivities.created.length - 3} more</p>
+                  {myActivities.createdCount > 3 && (
+                    <p className="text-xs text-gray-500">+{myActivities.createdCount - 3} more</p>
                   )}
                 </div>
               )}
@@ -290,10 +295,10 @@ const UserProfileSidebar = ({ user, onCreateActivity }) => {
             <div>
               <h4 className="text-sm font-semibold text-gray-700 mb-2 flex items-center">
                 <span className="mr-1">🤝</span>
-                Attending ({myActivities.joined.length})
+                Attending ({myActivities.joinedCount})
               </h4>
               {myActivities.joined.length === 0 ? (
-                <p className="text-xs text-gray-500">No activities joined yet</p>
+                <p className="text-xs text-gray-500">No upcoming activities</p>
               ) : (
                 <div className="space-y-2">
                   {myActivities.joined.slice(0, 3).map((activity) => (
@@ -307,8 +312,8 @@ const UserProfileSidebar = ({ user, onCreateActivity }) => {
                       </p>
                     </div>
                   ))}
-                  {myActivities.joined.length > 3 && (
-                    <p className="text-xs text-gray-500">+{myActivities.joined.length - 3} more</p>
+                  {myActivities.joinedCount > 3 && (
+                    <p className="text-xs text-gray-500">+{myActivities.joinedCount - 3} more</p>
                   )}
                 </div>
               )}
@@ -626,22 +631,33 @@ const ActivityCard = ({ activity, onJoin, showJoinButton = true, isOwn = false }
   const [showComments, setShowComments] = useState(false);
   const [comments, setComments] = useState([]);
   const [newComment, setNewComment] = useState('');
-  const [likes, setLikes] = useState({ count: 0, liked: false });
+  const [likes, setLikes] = useState({
+    count: activity.stats?.like_count || 0,
+    liked: activity.stats?.liked || false
+  });
+  const [commentCount, setCommentCount] = useState(activity.stats?.comment_count || 0);
   const [loading, setLoading] = useState(false);
+  const [fullDescription, setFullDescription] = useState(null);
+  const [showFullDescription, setShowFullDescription] = useState(false);
 
   useEffect(() => {
-    fetchLikes();
-  }, [activity.id]);
+    // The feed embeds social stats; only fall back to a per-card request when they're missing
+    if (activity.stats) {
+      setLikes({ count: activity.stats.like_count, liked: activity.stats.liked });
+      setCommentCount(activity.stats.comment_count);
+    } else {
+      fetchStats();
+    }
+  }, [activity.id, activity.stats]);
 
-  const fetchLikes = async () => {
+  const fetchStats = async () => {
     try {
-      const response = await axios.get(`${API}/activities/${activity.id}/likes`);
-      setLikes({
-        count: response.data.like_count,
-        liked: false // We'll check this properly in a real implementation
-      });
+      const response = await axios.post(`${API}/activities/stats`, { activity_ids: [activity.id] });
+      const stats = response.data.stats[activity.id];
+      setLikes({ count: stats.like_count, liked: stats.liked });
+      setCommentCount(stats.comment_count);
     } catch (error) {
-      console.error('Error fetching likes:', error);
+      console.error('Error fetching activity stats:', error);
     }
   };
 
@@ -656,6 +672,22 @@ const ActivityCard = ({ activity, onJoin, showJoinButton = true, isOwn = false }
     }
   };
 
+  // Feeds only carry the first DESCRIPTION_PREVIEW_LENGTH characters; the full text comes from the detail endpoint
+  const descriptionTruncated = (activity.description_preview || '').length >= DESCRIPTION_PREVIEW_LENGTH;
+
+  const toggleDescription = async () => {
+    if (!showFullDescription && fullDescription === null) {
+      try {
+        const response = await axios.get(`${API}/activities/${activity.id}`);
+        setFullDescription(response.data.description);
+      } catch (error) {
+        console.error('Error fetching activity details:', error);
+        return;
+      }
+    }
+    setShowFullDescription(!showFullDescription);
+  };
+
   const handleLike = async () => {
     try {
       const response = await axios.post(`${API}/activities/${activity.id}/like`);
@@ -679,6 +711,7 @@ const ActivityCard = ({ activity, onJoin, showJoinButton = true, isOwn = false }
         content: newComment
       });
       setComments([...comments, response.data.comment]);
+      setCommentCount(commentCount + 1);
       setNewComment('');
     } catch (error) {
       console.error('Error adding comment:', error);
@@ -729,7 +762,20 @@ const ActivityCard = ({ activity, onJoin, showJoinButton = true, isOwn = false }
       {/* Content */}
       <div className="p-4">
         <h3 className="text-lg font-semibold text-gray-900 mb-3">{activity.title}</h3>
-        <p className="text-gray-700 mb-4 leading-relaxed">{activity.description}</p>
+        <p className="text-gray-700 mb-4 leading-relaxed whitespace-pre-line">
+          {showFullDescription ? fullDescription : activity.description_preview}
+          {descriptionTruncated && (
+            <>
+              {!showFullDescription && '… '}
+              <button
+                onClick={toggleDescription}
+                className="ml-1 text-indigo-600 hover:text-indigo-800 text-sm font-medium"
+              >
+                {showFullDescription ? 'less' : 'more'}
+              </button>
+            </>
+          )}
+        </p>
         
         <div className="space-y-2 text-sm text-gray-600 mb-4">
           <div className="flex items-center">
@@ -742,7 +788,7 @@ const ActivityCard = ({ activity, onJoin, showJoinButton = true, isOwn = false }
           </div>
           <div className="flex items-center">
             <span className="font-medium">👥</span>
-            <span className="ml-2">{activity.participants.length} attending</span>
+            <span className="ml-2">{activity.participant_count} attending</span>
             {activity.max_participants && (
               <span> • {activity.max_participants} max</span>
             )}
@@ -783,7 +829,7 @@ const ActivityCard = ({ activity, onJoin, showJoinButton = true, isOwn = false }
             className="flex items-center space-x-1 text-gray-500 hover:text-blue-500 transition-colors"
           >
             <span>💬</span>
-            <span className="text-sm">{comments.length}</span>
+            <span className="text-sm">{commentCount}</span>
           </button>
 
           {showJoinButton && !isOwn && (
@@ -1109,8 +1155,8 @@ const UserDashboard = () => {
     setLoading(true);
     try {
       const params = locationFilter && locationFilter !== user.city 
-        ? { city_filter: locationFilter } 
-        : {};
+        ? { city_filter: locationFilter, include_stats: true } 
+        : { include_stats: true };
       const response = await axios.get(`${API}/activities/around-me`, { params });
       setActivitiesAroundMe(response.data.activities);
     } catch (error) {
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Script to backfill GeoJSON points on activities created before geo search
+"""
+import asyncio
+import os
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+# Load environment variables
+load_dotenv('/app/backend/.env')
+
+# MongoDB connection
+mongo_url = os.environ['MONGO_URL']
+client = AsyncIOMotorClient(mongo_url)
+db = client[os.environ['DB_NAME']]
+
+BATCH_SIZE = 500
+
+async def backfill_activity_geo():
+    """Set activities.geo from latitude/longitude wherever it is missing"""
+    query = {
+        "geo": {"$exists": False},
+        "latitude": {"$ne": None},
+        "longitude": {"$ne": None}
+    }
+    cursor = db.activities.find(query, {"_id": 0, "id": 1, "latitude": 1, "longitude": 1})
+    
+    updated = 0
+    batch = []
+    async for activity in cursor:
+        batch.append(UpdateOne(
+            {"id": activity["id"]},
+            {"$set": {"geo": {"type": "Point", "coordinates": [activity["longitude"], activity["latitude"]]}}}
+        ))
+        if len(batch) >= BATCH_SIZE:
+            result = await db.activities.bulk_write(batch, ordered=False)
+            updated += result.modified_count
+            batch = []
+    if batch:
+        result = await db.activities.bulk_write(batch, ordered=False)
+        updated += result.modified_count
+    
+    await db.activities.create_index([("geo", "2dsphere")], name="activities_geo_2dsphere")
+    return updated
+
+async def main():
+    print("🌍 Backfilling activity geo points...")
+    try:
+        updated = await backfill_activity_geo()
+        print(f"✅ Added geo points to {updated} activities")
+    except Exception as e:
+        print(f"❌ Error backfilling activity geo points: {e}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
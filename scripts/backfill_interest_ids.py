@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Script to resolve free-text interests on users and activities into canonical interest ids
+"""
+import asyncio
+import sys
+import os
+
+# Add the backend directory to the path
+sys.path.append('/app/backend')
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+from interests import vocabulary
+
+# Load environment variables
+load_dotenv('/app/backend/.env')
+
+# MongoDB connection
+mongo_url = os.environ['MONGO_URL']
+client = AsyncIOMotorClient(mongo_url)
+db = client[os.environ['DB_NAME']]
+
+BATCH_SIZE = 500
+
+async def backfill_collection(collection) -> int:
+    """Recompute interest_ids for every document in the collection"""
+    updated = 0
+    batch = []
+    async for document in collection.find({}, {"_id": 0, "id": 1, "interests": 1, "interest_ids": 1}):
+        interest_ids = vocabulary.resolve_many(document.get("interests") or [])
+        if interest_ids != document.get("interest_ids"):
+            batch.append(UpdateOne({"id": document["id"]}, {"$set": {"interest_ids": interest_ids}}))
+        if len(batch) >= BATCH_SIZE:
+            result = await collection.bulk_write(batch, ordered=False)
+            updated += result.modified_count
+            batch = []
+    if batch:
+        result = await collection.bulk_write(batch, ordered=False)
+        updated += result.modified_count
+    return updated
+
+async def main():
+    print("🏷️  Resolving interests to canonical ids...")
+    try:
+        users = await backfill_collection(db.users)
+        activities = await backfill_collection(db.activities)
+        print(f"✅ Updated interest ids on {users} users and {activities} activities")
+    except Exception as e:
+        print(f"❌ Error backfilling interest ids: {e}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
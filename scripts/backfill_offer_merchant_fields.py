@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Script to copy merchant business_type, city and geo onto existing discount offers
+"""
+import asyncio
+import sys
+import os
+
+# Add the backend directory to the path
+sys.path.append('/app/backend')
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from pymongo import UpdateMany
+
+# Load environment variables
+load_dotenv('/app/backend/.env')
+
+from server import offer_merchant_fields
+
+# MongoDB connection
+mongo_url = os.environ['MONGO_URL']
+client = AsyncIOMotorClient(mongo_url)
+db = client[os.environ['DB_NAME']]
+
+BATCH_SIZE = 500
+
+async def backfill_offer_merchant_fields():
+    """One UpdateMany per merchant, setting the denormalized merchant fields on all of its offers"""
+    cursor = db.merchants.find(
+        {}, {"_id": 0, "id": 1, "business_name": 1, "business_type": 1, "city": 1, "latitude": 1, "longitude": 1}
+    )
+    
+    updated = 0
+    batch = []
+    async for merchant in cursor:
+        batch.append(UpdateMany({"merchant_id": merchant["id"]}, {"$set": offer_merchant_fields(merchant)}))
+        if len(batch) >= BATCH_SIZE:
+            result = await db.discount_offers.bulk_write(batch, ordered=False)
+            updated += result.modified_count
+            batch = []
+    if batch:
+        result = await db.discount_offers.bulk_write(batch, ordered=False)
+        updated += result.modified_count
+    
+    return updated
+
+async def main():
+    print("🏷️  Backfilling merchant fields on discount offers...")
+    try:
+        updated = await backfill_offer_merchant_fields()
+        print(f"✅ Updated {updated} discount offers")
+    except Exception as e:
+        print(f"❌ Error backfilling discount offers: {e}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
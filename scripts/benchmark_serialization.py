@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: FastAPI's model path vs the RowSerializer/orjson fast path for list responses.
+
+The model path is what list endpoints used to do: build a Pydantic model per row, then let
+FastAPI validate the page against response_model and encode it with jsonable_encoder and
+json.dumps. The fast path fills model defaults into the raw rows and encodes them with orjson.
+Both run on synthetic activity summary rows, shaped as activity_summary_rows.projection returns
+them from MongoDB, and their outputs are checked to be identical.
+
+    python scripts/benchmark_serialization.py --rows 50,200,1000
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the backend directory to the path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "backend"))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from serialization import dumps
+from server import DESCRIPTION_PREVIEW_LENGTH, ActivityPage, ActivitySummary, activity_summary_rows
+
+def make_docs(count: int) -> list:
+    base = datetime(2030, 5, 1, 9, 30)
+    description = "Meet at the trailhead, bring water and snacks. " * 8
+    return [{
+        "id": f"activity-{i}",
+        "title": f"Weekend hike #{i}",
+        "description_preview": description[:DESCRIPTION_PREVIEW_LENGTH],
+        "date": base + timedelta(hours=i),
+        "location": "Mission Peak Trailhead",
+        "city": "Fremont",
+        "latitude": 37.51 + i * 1e-4,
+        "longitude": -121.88,
+        "max_participants": 12,
+        "category": "Outdoors",
+        "interests": ["hiking", "photography", "fitness"],
+        "creator_id": "user-1",
+        "creator_name": "Sarah Chen",
+        "participant_count": 8,
+        "waitlist_count": 0,
+        "like_count": i % 17,
+        "comment_count": i % 5,
+        "created_at": base - timedelta(days=1, seconds=i),
+    } for i in range(count)]
+
+async def model_path(docs: list, field) -> bytes:
+    payload = {"activities": [ActivitySummary(**doc) for doc in docs], "total_count": len(docs), "next_cursor": None}
+    content = await serialize_response(field=field, response_content=payload)
+    return JSONResponse(content).body
+
+def fast_path(docs: list) -> bytes:
+    return dumps({"activities": activity_summary_rows.rows(docs), "total_count": len(docs), "next_cursor": None})
+
+def best_of(repeat: int, number: int, run) -> float:
+    """Best average time per call in ms over `repeat` rounds of `number` calls"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            run()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="50,200,1000", help="comma-separated page sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    field = create_response_field(name="Response_benchmark", type_=ActivityPage)
+    loop = asyncio.new_event_loop()
+
+    print("⏱️  Serializing activity pages (best of {} rounds)".format(args.repeat))
+    print(f"{'rows':>6} {'model path':>14} {'fast path':>12} {'speedup':>9}")
+    for count in [int(n) for n in args.rows.split(",")]:
+        docs = make_docs(count)
+        slow_body = loop.run_until_complete(model_path(docs, field))
+        # response_model adds the page's unset optional keys as nulls; the rows themselves must match exactly
+        assert json.loads(slow_body)["activities"] == json.loads(fast_path(docs))["activities"], \
+            "fast path rows differ from the model path"
+
+        number = max(1, 2000 // count)
+        slow_ms = best_of(args.repeat, number, lambda: loop.run_until_complete(model_path(docs, field)))
+        fast_ms = best_of(args.repeat, number, lambda: fast_path(docs))
+        print(f"{count:>6} {slow_ms:>11.3f} ms {fast_ms:>9.3f} ms {slow_ms / fast_ms:>8.1f}x")
+    loop.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark: throughput of the main read endpoints as the number of API worker processes grows.
+
+Starts the backend under gunicorn (backend/gunicorn.conf.py) once per worker count, drives it
+with concurrent client processes for a fixed time and prints requests/sec and latency per
+endpoint, plus the speedup over the first worker count. Needs MongoDB (MONGO_URL/DB_NAME from
+backend/.env) with some data, e.g. from populate_sample_data.py; set REDIS_URL to benchmark
+the shared-state setup used in multi-worker deployments.
+
+    python scripts/benchmark_worker_scaling.py --workers 1,2,4 --duration 15
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import requests
+
+BACKEND_DIR = Path(__file__).resolve().parents[1] / "backend"
+
+ENDPOINTS = {
+    "around-me": ("activities/around-me", {}),
+    "recommended": ("activities/recommended", {}),
+    "discounts": ("discounts/all", {}),
+    "merchants-near-me": ("merchants/near-me", {}),
+}
+
+def start_backend(workers: int, port: int) -> subprocess.Popen:
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers), "BIND": f"127.0.0.1:{port}"}
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "server:app"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+def wait_until_ready(base_url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/health/ready", timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"Backend at {base_url} not ready after {timeout}s")
+
+def stop_backend(process: subprocess.Popen):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+def register_user(base_url: str, city: str) -> str:
+    suffix = uuid.uuid4().hex[:8]
+    response = requests.post(f"{base_url}/auth/register", json={
+        "name": f"Bench User {suffix}",
+        "email": f"bench.{suffix}@example.com",
+        "password": "BenchPassword123!",
+        "city": city,
+        "phone": "5550000000",
+        "interests": ["hiking", "food", "technology"]
+    })
+    response.raise_for_status()
+    return response.json()["token"]
+
+def client_loop(args) -> list:
+    """One client process: hit a single endpoint back to back until the deadline; returns latencies in ms"""
+    url, params, token, deadline = args
+    session = requests.Session()
+    session.headers["Authorization"] = f"Bearer {token}"
+    latencies = []
+    errors = 0
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            ok = session.get(url, params=params, timeout=10).status_code == 200
+        except requests.RequestException:
+            ok = False
+        if ok:
+            latencies.append((time.perf_counter() - started) * 1000)
+        else:
+            errors += 1
+    return [latencies, errors]
+
+def run_endpoint(base_url: str, path: str, params: dict, token: str, clients: int, duration: float) -> dict:
+    deadline = time.time() + duration
+    with multiprocessing.Pool(clients) as pool:
+        results = pool.map(client_loop, [(f"{base_url}/{path}", params, token, deadline)] * clients)
+    latencies = sorted(latency for result in results for latency in result[0])
+    errors = sum(result[1] for result in results)
+    if not latencies:
+        return {"rps": 0.0, "p50_ms": None, "p99_ms": None, "errors": errors}
+    return {
+        "rps": len(latencies) / duration,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "errors": errors
+    }
+
+def main():
+    cores = multiprocessing.cpu_count()
+    default_workers = sorted({1, *[n for n in (2, 4, 8, 16) if n <= cores]})
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default=",".join(map(str, default_workers)),
+                        help="comma-separated worker counts to compare")
+    parser.add_argument("--clients", type=int, default=cores * 2, help="concurrent client processes")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per endpoint")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--city", default="San Jose")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="comma-separated endpoint names")
+    args = parser.parse_args()
+
+    worker_counts = [int(n) for n in args.workers.split(",")]
+    endpoints = [name.strip() for name in args.endpoints.split(",")]
+    base_url = f"http://127.0.0.1:{args.port}/api"
+    print(f"🏁 Benchmarking {', '.join(endpoints)} on {cores} cores with {args.clients} clients, "
+          f"{args.duration:.0f}s per endpoint")
+
+    results = {}
+    token = None
+    for workers in worker_counts:
+        print(f"\n🚀 Starting backend with {workers} worker(s)...")
+        process = start_backend(workers, args.port)
+        try:
+            wait_until_ready(base_url)
+            if token is None:
+                token = register_user(base_url, args.city)
+            for name in endpoints:
+                path, params = ENDPOINTS[name]
+                # Warm caches and connections so every run measures steady state
+                run_endpoint(base_url, path, params, token, args.clients, min(2.0, args.duration))
+                results[(workers, name)] = run_endpoint(base_url, path, params, token, args.clients, args.duration)
+                result = results[(workers, name)]
+                print(f"   {name:<20} {result['rps']:>9.1f} req/s   p50 {result['p50_ms'] or 0:>7.1f} ms   "
+                      f"p99 {result['p99_ms'] or 0:>7.1f} ms   errors {result['errors']}")
+        finally:
+            stop_backend(process)
+
+    print(f"\n📊 Throughput (req/s) and speedup over {worker_counts[0]} worker(s):")
+    print(f"{'endpoint':<20}" + "".join(f"{f'{w} worker(s)':>22}" for w in worker_counts))
+    for name in endpoints:
+        baseline = results[(worker_counts[0], name)]["rps"] or 1.0
+        row = "".join(
+            f"{results[(w, name)]['rps']:>13.1f} ({results[(w, name)]['rps'] / baseline:>4.2f}x)" for w in worker_counts
+        )
+        print(f"{name:<20}{row}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Script to backfill and repair the search data behind /search and /search/autocomplete:
+search_terms on every activity and merchant, and the search_suggestions vocabulary.
+Run it once after deploying search, then periodically (e.g. nightly cron) to drop
+suggestions left behind by archived activities.
+"""
+import asyncio
+import sys
+import os
+
+# Add the backend directory to the path
+sys.path.append('/app/backend')
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv('/app/backend/.env')
+
+from server import ensure_indexes
+from search import rebuild_search_index
+
+# MongoDB connection
+mongo_url = os.environ['MONGO_URL']
+client = AsyncIOMotorClient(mongo_url)
+db = client[os.environ['DB_NAME']]
+
+async def main():
+    print("🔎 Building search index...")
+    try:
+        await ensure_indexes(db)
+        result = await rebuild_search_index(db)
+        print(f"✅ Indexed {result['activities']} activities and {result['merchants']} merchants")
+        print(f"✅ {result['suggestions']} autocomplete terms ({result['suggestions_removed']} stale terms removed)")
+    except Exception as e:
+        print(f"❌ Error building search index: {e}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Script to geocode merchants from the local gazetteer (backend/data/gazetteer.csv)
+"""
+import asyncio
+import sys
+import os
+
+# Add the backend directory to the path
+sys.path.append('/app/backend')
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+from geocoding import gazetteer
+
+# Load environment variables
+load_dotenv('/app/backend/.env')
+
+# MongoDB connection
+mongo_url = os.environ['MONGO_URL']
+client = AsyncIOMotorClient(mongo_url)
+db = client[os.environ['DB_NAME']]
+
+BATCH_SIZE = 500
+
+async def geocode_merchants(refresh: bool = False):
+    """Set merchants.latitude/longitude/geo from address and city; only merchants without geo unless refresh"""
+    query = {} if refresh else {"geo": {"$exists": False}}
+    cursor = db.merchants.find(query, {"_id": 0, "id": 1, "address": 1, "city": 1})
+    
+    updated = 0
+    unresolved = []
+    batch = []
+    async for merchant in cursor:
+        location = gazetteer.geocode(merchant.get("address", ""), merchant.get("city", ""))
+        if location is None:
+            unresolved.append(f"{merchant.get('address', '')}, {merchant.get('city', '')}")
+            continue
+        latitude, longitude = location
+        batch.append(UpdateOne(
+            {"id": merchant["id"]},
+            {"$set": {
+                "latitude": latitude,
+                "longitude": longitude,
+                "geo": {"type": "Point", "coordinates": [longitude, latitude]}
+            }}
+        ))
+        if len(batch) >= BATCH_SIZE:
+            result = await db.merchants.bulk_write(batch, ordered=False)
+            updated += result.modified_count
+            batch = []
+    if batch:
+        result = await db.merchants.bulk_write(batch, ordered=False)
+        updated += result.modified_count
+    
+    await db.merchants.create_index([("geo", "2dsphere")], name="merchants_geo_2dsphere")
+    return updated, unresolved
+
+async def main():
+    print(f"🌍 Geocoding merchants with {len(gazetteer)} gazetteer places...")
+    try:
+        updated, unresolved = await geocode_merchants(refresh="--refresh" in sys.argv)
+        print(f"✅ Geocoded {updated} merchants")
+        if unresolved:
+            print(f"⚠️  {len(unresolved)} merchants not in the gazetteer (add them to backend/data/gazetteer.csv):")
+            for place in unresolved:
+                print(f"   - {place}")
+    except Exception as e:
+        print(f"❌ Error geocoding merchants: {e}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Script to move the participants/waitlist/interested_users arrays out of activity documents
+into the activity_memberships collection and replace them with participant/waitlist counters.
+
+Safe to re-run: memberships are upserted on (activity_id, user_id) and only activities that
+still carry the arrays are touched. Run reconcile_activity_counters.py afterwards to double-check.
+"""
+import asyncio
+import sys
+import os
+import uuid
+from datetime import timedelta
+
+# Add the backend directory to the path
+sys.path.append('/app/backend')
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv('/app/backend/.env')
+
+from server import ensure_indexes
+
+# MongoDB connection
+mongo_url = os.environ['MONGO_URL']
+client = AsyncIOMotorClient(mongo_url)
+db = client[os.environ['DB_NAME']]
+
+BATCH_SIZE = 500
+LEGACY_ARRAYS = {"participants": "participant", "waitlist": "waitlisted", "interested_users": "interested"}
+
+def membership_upserts(activity: dict) -> list:
+    """Membership upserts for one activity; array order is kept through staggered created_at values"""
+    upserts = []
+    seen = set()
+    joined_at = activity.get("created_at")
+    for field, status in LEGACY_ARRAYS.items():
+        for position, user_id in enumerate(activity.get(field) or []):
+            # A user listed twice (e.g. interested and joined) keeps the strongest status
+            if user_id in seen:
+                continue
+            seen.add(user_id)
+            upserts.append(UpdateOne(
+                {"activity_id": activity["id"], "user_id": user_id},
+                {
+                    "$set": {
+                        "role": "creator" if user_id == activity["creator_id"] else "member",
+                        "status": status,
+                        "date": activity["date"]
+                    },
+                    "$setOnInsert": {
+                        "id": str(uuid.uuid4()),
+                        "created_at": joined_at + timedelta(milliseconds=position)
+                    }
+                },
+                upsert=True
+            ))
+    return upserts
+
+async def migrate_batch(activities: list):
+    memberships = [upsert for activity in activities for upsert in membership_upserts(activity)]
+    if memberships:
+        await db.activity_memberships.bulk_write(memberships, ordered=False)
+
+    # The arrays are only dropped once every membership of the batch is written
+    await db.activities.bulk_write([
+        UpdateOne(
+            {"id": activity["id"]},
+            {
+                "$set": {
+                    "participant_count": len(activity.get("participants") or []),
+                    "waitlist_count": len(activity.get("waitlist") or [])
+                },
+                "$unset": {field: "" for field in LEGACY_ARRAYS}
+            }
+        )
+        for activity in activities
+    ], ordered=False)
+
+async def main():
+    print("🚚 Migrating activity participants into activity_memberships...")
+    try:
+        await ensure_indexes(db)
+        projection = {"_id": 0, "id": 1, "creator_id": 1, "date": 1, "created_at": 1, **{field: 1 for field in LEGACY_ARRAYS}}
+        query = {"$or": [{field: {"$exists": True}} for field in LEGACY_ARRAYS]}
+        migrated = 0
+        while True:
+            # Migrated activities drop out of the query, so the next batch always starts from the top
+            batch = await db.activities.find(query, projection).limit(BATCH_SIZE).to_list(BATCH_SIZE)
+            if not batch:
+                break
+            await migrate_batch(batch)
+            migrated += len(batch)
+            print(f"   ...{migrated} activities migrated")
+        print(f"✅ Migrated {migrated} activities")
+    except Exception as e:
+        print(f"❌ Error migrating memberships: {e}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
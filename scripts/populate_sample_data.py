@@ -16,6 +16,9 @@ from dotenv import load_dotenv
 import bcrypt
 import uuid
 
+from geocoding import gazetteer
+from search import rebuild_search_index
+
 # Load environment variables
 load_dotenv('/app/backend/.env')
 
@@ -119,8 +122,8 @@ async def create_sample_activities(users):
             "interests": ["networking", "technology", "career", "professional development"],
             "creator_id": users[0]["id"],
             "creator_name": users[0]["name"],
-            "participants": [users[0]["id"]],
-            "interested_users": [],
+            "participant_count": 1,
+            "waitlist_count": 0,
             "created_at": datetime.utcnow() - timedelta(hours=2)
         },
         {
@@ -137,8 +140,8 @@ async def create_sample_activities(users):
             "interests": ["startups", "entrepreneurship", "business", "innovation", "networking"],
             "creator_id": users[1]["id"],
             "creator_name": users[1]["name"],
-            "participants": [users[1]["id"]],
-            "interested_users": [],
+            "participant_count": 1,
+            "waitlist_count": 0,
             "created_at": datetime.utcnow() - timedelta(hours=5)
         },
         {
@@ -155,8 +158,8 @@ async def create_sample_activities(users):
             "interests": ["marketing", "digital marketing", "growth", "education", "business"],
             "creator_id": users[2]["id"],
             "creator_name": users[2]["name"],
-            "participants": [users[2]["id"]],
-            "interested_users": [],
+            "participant_count": 1,
+            "waitlist_count": 0,
             "created_at": datetime.utcnow() - timedelta(hours=8)
         },
         {
@@ -173,8 +176,8 @@ async def create_sample_activities(users):
             "interests": ["AI", "machine learning", "technology", "data science", "education"],
             "creator_id": users[3]["id"],
             "creator_name": users[3]["name"],
-            "participants": [users[3]["id"]],
-            "interested_users": [],
+            "participant_count": 1,
+            "waitlist_count": 0,
             "created_at": datetime.utcnow() - timedelta(hours=12)
         },
         {
@@ -191,8 +194,8 @@ async def create_sample_activities(users):
             "interests": ["leadership", "management", "professional development", "team building"],
             "creator_id": users[4]["id"],
             "creator_name": users[4]["name"],
-            "participants": [users[4]["id"]],
-            "interested_users": [],
+            "participant_count": 1,
+            "waitlist_count": 0,
             "created_at": datetime.utcnow() - timedelta(hours=18)
         },
         {
@@ -209,8 +212,8 @@ async def create_sample_activities(users):
             "interests": ["data analytics", "SQL", "tableau", "education", "career development"],
             "creator_id": users[0]["id"],
             "creator_name": users[0]["name"],
-            "participants": [users[0]["id"]],
-            "interested_users": [],
+            "participant_count": 1,
+            "waitlist_count": 0,
             "created_at": datetime.utcnow() - timedelta(minutes=45)
         },
         # Additional professional networking events
@@ -228,8 +231,8 @@ async def create_sample_activities(users):
             "interests": ["product management", "strategy", "networking", "technology"],
             "creator_id": users[1]["id"],
             "creator_name": users[1]["name"],
-            "participants": [users[1]["id"]],
-            "interested_users": [],
+            "participant_count": 1,
+            "waitlist_count": 0,
             "created_at": datetime.utcnow() - timedelta(hours=3)
         },
         {
@@ -246,8 +249,8 @@ async def create_sample_activities(users):
             "interests": ["innovation", "design thinking", "entrepreneurship", "workshops"],
             "creator_id": users[3]["id"],
             "creator_name": users[3]["name"],
-            "participants": [users[3]["id"]],
-            "interested_users": [],
+            "participant_count": 1,
+            "waitlist_count": 0,
             "created_at": datetime.utcnow() - timedelta(hours=6)
         },
         {
@@ -264,8 +267,8 @@ async def create_sample_activities(users):
             "interests": ["sales", "business development", "B2B", "networking"],
             "creator_id": users[2]["id"],
             "creator_name": users[2]["name"],
-            "participants": [users[2]["id"]],
-            "interested_users": [],
+            "participant_count": 1,
+            "waitlist_count": 0,
             "created_at": datetime.utcnow() - timedelta(hours=1)
         },
         {
@@ -282,8 +285,8 @@ async def create_sample_activities(users):
             "interests": ["UX design", "UI design", "portfolio", "career", "design"],
             "creator_id": users[4]["id"],
             "creator_name": users[4]["name"],
-            "participants": [users[4]["id"]],
-            "interested_users": [],
+            "participant_count": 1,
+            "waitlist_count": 0,
             "created_at": datetime.utcnow() - timedelta(minutes=30)
         },
         {
@@ -300,8 +303,8 @@ async def create_sample_activities(users):
             "interests": ["fintech", "finance", "innovation", "cryptocurrency", "banking"],
             "creator_id": users[0]["id"],
             "creator_name": users[0]["name"],
-            "participants": [users[0]["id"]],
-            "interested_users": [],
+            "participant_count": 1,
+            "waitlist_count": 0,
             "created_at": datetime.utcnow() - timedelta(hours=4)
         },
         {
@@ -318,17 +321,34 @@ async def create_sample_activities(users):
             "interests": ["DevOps", "AWS", "cloud computing", "kubernetes", "docker"],
             "creator_id": users[1]["id"],
             "creator_name": users[1]["name"],
-            "participants": [users[1]["id"]],
-            "interested_users": [],
+            "participant_count": 1,
+            "waitlist_count": 0,
             "created_at": datetime.utcnow() - timedelta(hours=7)
         }
     ]
     
+    # GeoJSON points for the 2dsphere index used by /activities/around-me
+    for activity in sample_activities:
+        activity["geo"] = {"type": "Point", "coordinates": [activity["longitude"], activity["latitude"]]}
+    
     # Clear existing sample activities
     await db.activities.delete_many({"creator_id": {"$in": [user["id"] for user in users]}})
     
-    # Insert sample activities
+    # Insert sample activities; each creator holds the first seat through a membership
     await db.activities.insert_many(sample_activities)
+    await db.activity_memberships.delete_many({"user_id": {"$in": [user["id"] for user in users]}})
+    await db.activity_memberships.insert_many([
+        {
+            "id": str(uuid.uuid4()),
+            "activity_id": activity["id"],
+            "user_id": activity["creator_id"],
+            "role": "creator",
+            "status": "participant",
+            "date": activity["date"],
+            "created_at": activity["created_at"]
+        }
+        for activity in sample_activities
+    ])
     print(f"✅ Created {len(sample_activities)} sample activities")
     return sample_activities
 
@@ -518,6 +538,12 @@ async def create_sample_merchants():
         }
     ]
     
+    for merchant in sample_merchants:
+        location = gazetteer.geocode(merchant["address"], merchant["city"])
+        if location:
+            merchant["latitude"], merchant["longitude"] = location
+            merchant["geo"] = {"type": "Point", "coordinates": [location[1], location[0]]}
+    
     # Clear existing sample merchants
     await db.merchants.delete_many({"email": {"$regex": "@.*\\.com"}})
     
@@ -835,6 +861,15 @@ async def create_sample_discount_offers(merchants):
         }
     ]
     
+    # Offers carry their merchant's business type and location so they can be filtered without a join
+    merchants_by_id = {merchant["id"]: merchant for merchant in merchants}
+    for offer in sample_offers:
+        merchant = merchants_by_id[offer["merchant_id"]]
+        offer["business_type"] = merchant["business_type"].lower()
+        offer["city"] = merchant["city"]
+        if merchant.get("geo"):
+            offer["geo"] = merchant["geo"]
+    
     # Clear existing sample offers
     await db.discount_offers.delete_many({"merchant_id": {"$in": [merchant["id"] for merchant in merchants]}})
     
@@ -860,6 +895,10 @@ async def main():
         # Create sample discount offers
         offers = await create_sample_discount_offers(merchants)
         
+        # Index the new activities and merchants for /search and autocomplete
+        await rebuild_search_index(db)
+        print("✅ Built search index")
+        
         print("\n🎉 Sample data population completed successfully!")
         print(f"📊 Summary:")
         print(f"   • {len(users)} sample users created")
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Script to repair drift in the denormalized like/comment counters on activities.
+Run it once after deploying the counters, then periodically (e.g. nightly cron).
+"""
+import asyncio
+import sys
+import os
+
+# Add the backend directory to the path
+sys.path.append('/app/backend')
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv('/app/backend/.env')
+
+from server import reconcile_activity_counters
+
+# MongoDB connection
+mongo_url = os.environ['MONGO_URL']
+client = AsyncIOMotorClient(mongo_url)
+db = client[os.environ['DB_NAME']]
+
+async def main():
+    print("🔧 Reconciling activity like/comment counters...")
+    try:
+        repaired = await reconcile_activity_counters(db)
+        print(f"✅ Repaired counters on {repaired} activities")
+    except Exception as e:
+        print(f"❌ Error reconciling counters: {e}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
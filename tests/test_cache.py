@@ -0,0 +1,48 @@
+import asyncio
+
+import cache
+from cache import FeedCache
+
+def test_concurrent_misses_share_one_fill(monkeypatch):
+    monkeypatch.setattr(cache, "get_redis", lambda: None)
+    feed_cache = FeedCache(prefix="test:feed")
+    fills = []
+
+    async def build_page():
+        fills.append(1)
+        await asyncio.sleep(0.01)
+        return b'{"activities":[]}'
+
+    async def browse():
+        return await asyncio.gather(*(feed_cache.get_or_fill("austin", "50:", build_page) for _ in range(10)))
+
+    pages = asyncio.run(browse())
+
+    assert pages == [b'{"activities":[]}'] * 10
+    assert len(fills) == 1
+    assert feed_cache.fills == 1
+    assert feed_cache.coalesced == 9
+    assert feed_cache._fill_locks == {}
+
+def test_invalidation_only_refills_its_scope(monkeypatch):
+    monkeypatch.setattr(cache, "get_redis", lambda: None)
+    feed_cache = FeedCache(prefix="test:feed")
+    pages = iter([b"austin-1", b"boston-1", b"austin-2"])
+
+    async def build_page():
+        return next(pages)
+
+    async def browse():
+        first = await feed_cache.get_or_fill("austin", "50:", build_page)
+        other = await feed_cache.get_or_fill("boston", "50:", build_page)
+        await feed_cache.invalidate("austin")
+        return (
+            first,
+            await feed_cache.get_or_fill("austin", "50:", build_page),
+            other,
+            await feed_cache.get_or_fill("boston", "50:", build_page),
+        )
+
+    assert asyncio.run(browse()) == (b"austin-1", b"austin-2", b"boston-1", b"boston-1")
+    assert feed_cache.fills == 3
+    assert feed_cache.hits == 1
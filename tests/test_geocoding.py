@@ -0,0 +1,28 @@
+from geocoding import Gazetteer, gazetteer
+
+def write_gazetteer(tmp_path):
+    path = tmp_path / "gazetteer.csv"
+    path.write_text(
+        "place,latitude,longitude\n"
+        "Palo Alto,37.4419,-122.1430\n"
+        "\"567 University Avenue, Palo Alto\",37.4484,-122.1590\n"
+    )
+    return path
+
+def test_geocode_prefers_address_over_city(tmp_path):
+    places = Gazetteer(write_gazetteer(tmp_path))
+
+    assert places.geocode("567  University Avenue", "palo alto") == (37.4484, -122.1590)
+    assert places.geocode("1 Unknown Street", "Palo Alto") == (37.4419, -122.1430)
+    assert places.geocode("1 Unknown Street", "Nowhere") is None
+
+def test_missing_gazetteer_file_geocodes_nothing(tmp_path):
+    places = Gazetteer(tmp_path / "missing.csv")
+
+    assert len(places) == 0
+    assert places.geocode("567 University Avenue", "Palo Alto") is None
+
+def test_bundled_gazetteer_covers_frontend_cities():
+    for city in ["Campbell", "Cupertino", "Fremont", "Milpitas", "Mountain View", "Palo Alto",
+                 "San Francisco", "San Jose", "Santa Clara", "Santa Cruz", "Sunnyvale"]:
+        assert gazetteer.lookup(city) is not None
@@ -0,0 +1,31 @@
+from interests import InterestVocabulary
+
+def test_aliases_resolve_to_canonical_ids():
+    vocabulary = InterestVocabulary()
+
+    assert vocabulary.resolve("#Hikes") == "hiking"
+    assert vocabulary.resolve("  Board   Game ") == "board-games"
+    assert vocabulary.resolve_many(["tech", "Technology", "film"]) == ["movies", "technology"]
+    # Unseen interests become their own slug id
+    assert vocabulary.resolve("Street Food") == "street-food"
+
+def test_related_and_expand_follow_whole_word_containment():
+    vocabulary = InterestVocabulary()
+    vocabulary.resolve("street food")
+    vocabulary.resolve("startups and founders")
+
+    assert vocabulary.related("food") == {"food", "street-food"}
+    assert "street-food" in vocabulary.related("food") and "food" in vocabulary.related("street-food")
+    # "art" is inside "startups" as a substring, not as a word
+    assert "art" not in vocabulary.related("startups-and-founders")
+    assert vocabulary.expand(["food", "yoga"]) == ["food", "street-food", "yoga"]
+
+def test_learned_vocabulary_is_capped():
+    vocabulary = InterestVocabulary(max_learned=2)
+    vocabulary.learn(["jazz-club", "salsa-night", "live-jazz"])
+
+    assert vocabulary.learned == 2
+    assert "live-jazz" not in vocabulary.labels
+    # Past the cap an interest still resolves to a stable id, just without partial matches
+    assert vocabulary.resolve("Live Jazz") == "live-jazz"
+    assert vocabulary.related("live-jazz") == {"live-jazz"}
@@ -0,0 +1,29 @@
+import random
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from server import decode_cursor, encode_cursor, geo_min_distance, keyset_filter
+
+def test_geo_cursor_never_resumes_past_the_boundary_row():
+    rng = random.Random(7)
+    for _ in range(10000):
+        # $geoNear returns metres * 0.001; the cursor carries that km value through JSON
+        metres = rng.uniform(0, 50000)
+        distance_km = metres * 0.001
+        assert geo_min_distance(encode_cursor("distance_km", distance_km, "activity-1")) <= metres
+
+def test_cursor_from_another_listing_is_rejected():
+    created_at_cursor = encode_cursor("created_at", datetime(2030, 1, 1, 12, 0), "activity-1")
+    distance_cursor = encode_cursor("distance_km", 1.25, "activity-1")
+
+    assert decode_cursor(created_at_cursor, "created_at") == (datetime(2030, 1, 1, 12, 0), "activity-1")
+    for call in (
+        lambda: geo_min_distance(created_at_cursor),
+        lambda: keyset_filter(distance_cursor, "created_at"),
+        lambda: decode_cursor("not-a-cursor", "created_at"),
+    ):
+        with pytest.raises(HTTPException) as error:
+            call()
+        assert error.value.status_code == 400
@@ -0,0 +1,21 @@
+import asyncio
+import json
+
+import realtime
+from realtime import MessageHub
+
+class UnavailableRedis:
+    async def publish(self, channel, payload):
+        raise ConnectionError("Connection refused")
+
+def test_publish_survives_a_redis_outage(monkeypatch):
+    monkeypatch.setattr(realtime, "get_redis", lambda: UnavailableRedis())
+    hub = MessageHub()
+    queue = asyncio.Queue(maxsize=hub.queue_size)
+    hub.connections["user-1"].add(queue)
+
+    asyncio.run(hub.publish("user-1", {"type": "new_message"}))
+
+    assert hub.redis_errors == 1
+    # Connections on this worker still get the event
+    assert json.loads(queue.get_nowait()) == {"type": "new_message"}
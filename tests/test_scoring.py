@@ -0,0 +1,89 @@
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from scoring import InterestEncoder, batch_interest_scores, haversine_km, score_candidates
+from server import calculate_distance, calculate_interest_match_score
+
+INTEREST_POOL = [
+    "hiking", "Hiking ", "hike", "food", "street food", "Food", "AI", "ai research", "music",
+    "live music", "board games", "games", "coffee", "wine", "networking", "tech", "technology",
+    "photography", "art", "startups", "fitness"
+]
+
+def random_interests(rng, max_size=5):
+    return rng.sample(INTEREST_POOL, rng.randint(0, max_size))
+
+def test_interest_scores_match_scalar_function():
+    rng = random.Random(7)
+    for _ in range(50):
+        user_interests = random_interests(rng)
+        activity_interests = [random_interests(rng) for _ in range(40)]
+
+        expected = [calculate_interest_match_score(user_interests, interests) for interests in activity_interests]
+        actual = batch_interest_scores(user_interests, activity_interests)
+
+        assert actual.tolist() == pytest.approx(expected)
+
+def test_interest_scores_base_cases():
+    assert batch_interest_scores([], [["hiking"], []]).tolist() == [0.3, 0.3]
+    assert batch_interest_scores(["hiking"], [[]]).tolist() == [0.2]
+    assert batch_interest_scores(["hiking"], []).tolist() == []
+
+def test_shared_encoder_keeps_results_stable():
+    encoder = InterestEncoder()
+    first = batch_interest_scores(["food"], [["street food"], ["wine"]], encoder)
+    batch_interest_scores(["art", "coffee"], [["photography"]], encoder)
+    second = batch_interest_scores(["food"], [["street food"], ["wine"], ["food"]], encoder)
+
+    assert second[:2].tolist() == pytest.approx(first.tolist())
+    assert second[2] == pytest.approx(calculate_interest_match_score(["food"], ["food"]))
+
+def test_haversine_matches_geodesic_distance():
+    rng = random.Random(11)
+    origin = (37.7749, -122.4194)
+    lats = np.array([rng.uniform(-60, 60) for _ in range(100)] + [37.4419, 37.7749])
+    lons = np.array([rng.uniform(-180, 180) for _ in range(100)] + [-122.1430, -122.4194])
+
+    distances = haversine_km(origin[0], origin[1], lats, lons)
+
+    for lat, lon, distance in zip(lats, lons, distances):
+        # Spherical vs ellipsoidal earth: within 0.5% (plus a little slack for zero distance)
+        assert distance == pytest.approx(calculate_distance(origin[0], origin[1], lat, lon), rel=5e-3, abs=1e-6)
+
+def test_score_candidates_components():
+    now = datetime(2025, 6, 1, 12, 0)
+    candidates = [
+        {"id": "near", "interests": ["hiking"], "distance_km": 1.0, "created_at": now,
+         "participant_count": 50, "like_count": 0},
+        {"id": "coords", "interests": [], "latitude": 37.4419, "longitude": -122.1430,
+         "created_at": now - timedelta(hours=72), "participant_count": 0, "like_count": 0},
+        {"id": "unknown", "interests": ["wine"], "created_at": now, "like_count": 3},
+    ]
+    weights = {"interest": 0.45, "distance": 0.25, "recency": 0.15, "popularity": 0.15}
+
+    scores = score_candidates(candidates, ["hiking"], now, 50.0, weights, origin=(37.7749, -122.4194))
+
+    assert scores["interest"].tolist() == pytest.approx([1.0, 0.2, 0.0])
+    expected_coords_distance = 1.0 - calculate_distance(37.7749, -122.4194, 37.4419, -122.1430) / 50.0
+    assert scores["distance"].tolist() == pytest.approx([0.98, expected_coords_distance, 0.5], abs=0.01)
+    assert scores["recency"].tolist() == pytest.approx([1.0, 0.5, 1.0])
+    assert scores["popularity"][0] == pytest.approx(1.0)
+    assert scores["popularity"][1] == 0.0
+    assert scores["total"][0] > scores["total"][2] > scores["total"][1]
+
+def test_vocabulary_encoder_uses_whole_word_partial_matches():
+    from interests import InterestVocabulary
+
+    vocabulary = InterestVocabulary()
+    street_food = vocabulary.resolve("street food")
+    scores = batch_interest_scores(
+        ["art", "food"],
+        [["startups"], [street_food]],
+        InterestEncoder(related=vocabulary.related)
+    )
+
+    # "art" is a substring of "startups" but not a word of it; "food" is a word of "street food"
+    assert scores.tolist() == pytest.approx([0.0, 0.3])
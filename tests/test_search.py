@@ -0,0 +1,40 @@
+from search import (
+    ACTIVITY_SEARCH_FIELDS, document_terms, edit_distance, query_keys, rank_suggestions, suggestion_keys, tokenize
+)
+
+def test_document_terms_fold_case_punctuation_stopwords_and_plurals():
+    doc = {
+        "title": "🥾 Sunrise Hikes at Mission Peak!",
+        "description": "Bring water and snacks",
+        "category": "Outdoors",
+        "interests": ["hiking", "photography"],
+    }
+
+    assert tokenize("Hikes at the Peak!") == ["hikes", "peak"]
+    assert document_terms(doc, ACTIVITY_SEARCH_FIELDS) == [
+        "bring", "hike", "hiking", "mission", "outdoor", "peak", "photography", "snack", "sunrise", "water"
+    ]
+
+def test_edit_distance_counts_transpositions_as_one_edit():
+    assert edit_distance("hiking", "hiking") == 0
+    assert edit_distance("hikign", "hiking") == 1
+    assert edit_distance("hikng", "hiking") == 1
+    assert edit_distance("yoga", "pizza") == 4
+
+def test_one_typo_prefixes_share_a_key_with_the_term():
+    keys = set(suggestion_keys("photography"))
+    for typed in ("pho", "photo", "phot0", "pohto", "photto", "phto"):
+        assert keys & set(query_keys(typed)), typed
+    # Short prefixes must match exactly
+    assert not keys & set(query_keys("pjo"))
+
+def test_rank_suggestions_prefers_exact_prefixes_then_popularity():
+    candidates = [
+        {"term": "hiking", "count": 3},
+        {"term": "hike", "count": 10},
+        {"term": "hockey", "count": 50},
+        {"term": "bike", "count": 40},
+    ]
+
+    assert [s["term"] for s in rank_suggestions("hik", candidates, 5)] == ["hike", "hiking"]
+    assert [(s["term"], s["distance"]) for s in rank_suggestions("hiek", candidates, 5)] == [("hike", 1), ("hiking", 1)]
@@ -0,0 +1,74 @@
+import json
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+
+from serialization import RowSerializer, dumps
+from server import Activity, Conversation, DiscountOffer, Message
+
+def activity_doc(i):
+    return {
+        "id": f"activity-{i}",
+        "title": f"Hike {i}",
+        "description": "A long walk " * 20,
+        "date": datetime(2030, 5, 1, 9, 30) + timedelta(hours=i),
+        "location": "Mission Peak",
+        "city": "Fremont",
+        "latitude": 37.51,
+        "longitude": -121.88,
+        "max_participants": 10,
+        "category": "Outdoors",
+        "interests": ["hiking"],
+        "creator_id": "user-1",
+        "creator_name": "Sarah",
+        "participant_count": 2,
+        "created_at": datetime(2030, 4, 1, 8, 0, 0, 123000),
+    }
+
+def slow_path(model, docs):
+    return json.loads(json.dumps(jsonable_encoder([model(**doc) for doc in docs])))
+
+def test_fast_path_matches_pydantic_path():
+    cases = [
+        (Activity, [activity_doc(i) for i in range(5)]),
+        (DiscountOffer, [{
+            "id": "offer-1", "merchant_id": "m-1", "merchant_name": "AMC", "title": "Popcorn",
+            "description": "Free popcorn", "discount_percentage": 0, "minimum_buddies": 2,
+            "valid_until": datetime(2030, 1, 1), "terms_conditions": "One per group",
+            "max_redemptions": None, "created_at": datetime(2029, 12, 1)
+        }]),
+        (Message, [{
+            "id": "msg-1", "sender_id": "a", "recipient_id": "b", "content": "hi", "created_at": datetime(2030, 1, 1)
+        }]),
+    ]
+    for model, docs in cases:
+        serializer = RowSerializer(model)
+        assert json.loads(dumps(serializer.rows(docs))) == slow_path(model, docs)
+
+def test_projection_and_defaults_follow_the_model():
+    serializer = RowSerializer(Activity)
+
+    assert serializer.projection["_id"] == 0
+    assert set(serializer.projection) - {"_id"} == set(Activity.model_fields)
+    assert serializer.row({"id": "a"})["waitlist_count"] == 0
+    assert serializer.row({"id": "a", "like_count": 3})["like_count"] == 3
+
+def test_activity_summary_never_projects_unbounded_fields():
+    from server import activity_summary_rows
+
+    projection = activity_summary_rows.projection
+    assert "description" not in projection
+    assert not {"participants", "waitlist", "interested_users"} & set(Activity.model_fields)
+    assert projection["participant_count"] == 1
+
+def test_conversation_with_missing_partner():
+    # $arrayElemAt over an empty $lookup leaves partner out of the row entirely
+    row = {
+        "last_message": {
+            "id": "msg-1", "sender_id": "a", "recipient_id": "deleted-user", "content": "hi",
+            "created_at": datetime(2030, 1, 1)
+        },
+        "unread_count": 0
+    }
+
+    assert Conversation(**row).partner is None
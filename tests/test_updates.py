@@ -0,0 +1,19 @@
+import pytest
+from fastapi import HTTPException
+
+from server import Merchant, MerchantUpdate, User, UserUpdate, update_changes
+
+def test_null_cannot_clear_a_required_field():
+    for field in ("name", "city", "interests"):
+        with pytest.raises(HTTPException) as error:
+            update_changes(UserUpdate.model_validate({field: None}), User)
+        assert error.value.status_code == 400
+    with pytest.raises(HTTPException):
+        update_changes(MerchantUpdate.model_validate({"business_name": None}), Merchant)
+
+def test_null_clears_optional_fields_and_unset_fields_are_left_alone():
+    assert update_changes(UserUpdate.model_validate({"profile_photo": None, "bio": "Hi"}), User) == {
+        "profile_photo": None, "bio": "Hi"
+    }
+    assert update_changes(MerchantUpdate.model_validate({"website": None}), Merchant) == {"website": None}
+    assert update_changes(UserUpdate(), User) == {}